@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ajo_api.settings')
+# ASGI 서버에서는 조회 뷰를 async 버전으로 라우팅 (batch_api/urls.py)
+os.environ.setdefault('BATCH_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
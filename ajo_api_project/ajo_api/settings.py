@@ -66,13 +66,32 @@ TEMPLATES = [
 WSGI_APPLICATION = 'ajo_api.wsgi.application'
 
 # Database 설정
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '10000'))  # 잠금 대기 시간 (ms)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),  # 연결 재사용 (초)
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# SQLite 성능 프로필 - 연결이 열릴 때마다 적용 (batch_api.db.on_connection_created)
+# WAL: 배치가 쓰는 동안에도 health/status/list 조회가 막히지 않음
+SQLITE_PERFORMANCE_PROFILE = os.environ.get('SQLITE_PERFORMANCE_PROFILE', 'True') == 'True'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': 268435456,  # 256MB
+    'cache_size': -65536,  # 64MB (음수: KiB 단위)
+    'temp_store': 'MEMORY',
+} if SQLITE_PERFORMANCE_PROFILE else {}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -119,3 +138,129 @@ AEP_DATASET_ID = '68f86345f6b3bff0002ce60f'
 
 # 개발 환경에서는 Mock 모드 사용 (실제 전송 안 함)
 AEP_MOCK_MODE = False  # True: 테스트 모드, False: 실제 전송
+
+# 동시 전송 워커 수 (in-flight 요청 최대 개수)
+AEP_MAX_WORKERS = int(os.environ.get('AEP_MAX_WORKERS', '8'))
+
+# AEP HTTP 커넥션 풀 (keep-alive 재사용)
+AEP_HTTP_POOL_SIZE = int(os.environ.get('AEP_HTTP_POOL_SIZE', AEP_MAX_WORKERS))
+AEP_CONNECT_TIMEOUT = float(os.environ.get('AEP_CONNECT_TIMEOUT', '3.05'))  # TCP/TLS 연결 타임아웃 (초)
+AEP_READ_TIMEOUT = float(os.environ.get('AEP_READ_TIMEOUT', '10'))  # 응답 대기 타임아웃 (초)
+
+# async 전송: 스레드 대신 프로세스 공유 이벤트 루프 + aiohttp 커넥션 풀로 전송 (aiohttp 설치 필요)
+# 요청마다 스레드를 쓰지 않으므로 AEP_MAX_WORKERS (동시 요청 수) 를 수백 단위로 올릴 수 있다
+AEP_ASYNC_SEND = os.environ.get('AEP_ASYNC_SEND', 'False') == 'True'
+
+# 헬스/상태/목록/메트릭 조회 뷰를 async 버전으로 라우팅 - ASGI 배포용 (asgi.py 가 기본값 True 로 설정)
+# WSGI (runserver, gunicorn) 에서는 sync 뷰가 더 빠르다
+BATCH_ASYNC_VIEWS = os.environ.get('BATCH_ASYNC_VIEWS', 'False') == 'True'
+
+# 요청 본문 gzip 압축 (Content-Encoding: gzip) - 단건/Batch 요청 모두, AEP_GZIP_MIN_BYTES 미만 본문은 그대로 전송
+AEP_GZIP_ENABLED = os.environ.get('AEP_GZIP_ENABLED', 'False') == 'True'
+AEP_GZIP_LEVEL = int(os.environ.get('AEP_GZIP_LEVEL', '6'))  # 1 (빠름) ~ 9 (작음)
+AEP_GZIP_MIN_BYTES = int(os.environ.get('AEP_GZIP_MIN_BYTES', '512'))
+
+# Batch 모드: 여러 메시지를 /collection/batch/ 요청 1회로 묶어서 전송
+AEP_BATCH_MODE = os.environ.get('AEP_BATCH_MODE', 'False') == 'True'
+AEP_BATCH_ENDPOINT = os.environ.get('AEP_BATCH_ENDPOINT')  # 미설정 시 Streaming 엔드포인트에서 유도
+AEP_BATCH_MAX_MESSAGES = int(os.environ.get('AEP_BATCH_MAX_MESSAGES', '100'))  # 요청당 최대 메시지 수
+AEP_BATCH_MAX_BYTES = int(os.environ.get('AEP_BATCH_MAX_BYTES', '1000000'))  # 요청 본문 최대 크기 (bytes)
+
+# 배치 청크 처리 (id 기준 keyset 페이지네이션, 청크마다 is_sent 커밋)
+BATCH_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', '1000'))
+BATCH_ERROR_SAMPLE_SIZE = int(os.environ.get('BATCH_ERROR_SAMPLE_SIZE', '100'))  # error_message 에 남길 최대 에러 수
+
+# POST /api/batch/run/ 은 작업을 큐에 등록만 하고 즉시 응답
+# True: 웹 프로세스 안의 백그라운드 스레드가 실행, False: batch_worker 커맨드가 실행
+BATCH_INLINE_WORKER = os.environ.get('BATCH_INLINE_WORKER', 'True') == 'True'
+# 실행 중(RUNNING) 작업은 이 초의 1/5 마다 heartbeat 를 남기고, 이 초 동안 끊기면 다른 워커가 이어서 실행
+BATCH_JOB_STALE_SECONDS = int(os.environ.get('BATCH_JOB_STALE_SECONDS', '300'))
+
+# JSON 직렬화 백엔드: auto (orjson > msgspec > json 중 설치된 것), orjson, msgspec, json
+BATCH_JSON_BACKEND = os.environ.get('BATCH_JSON_BACKEND', 'auto')
+
+# ===========================
+# 로깅 설정
+# ===========================
+
+BATCH_LOG_LEVEL = os.environ.get('BATCH_LOG_LEVEL', 'INFO')  # 청크/배치 요약 로그 레벨
+AEP_RECORD_LOG_LEVEL = os.environ.get('AEP_RECORD_LOG_LEVEL', 'WARNING')  # 레코드 단위 로그 레벨 (DEBUG: 페이로드 출력)
+AEP_LOG_SAMPLE_RATE = float(os.environ.get('AEP_LOG_SAMPLE_RATE', '0.01'))  # 레코드 단위 로그 샘플링 비율
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'record_sampling': {
+            '()': 'batch_api.log.SamplingFilter',
+            'rate': AEP_LOG_SAMPLE_RATE,
+        },
+    },
+    'formatters': {
+        'structured': {
+            'format': 'time=%(asctime)s level=%(levelname)s logger=%(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'structured',
+        },
+    },
+    'loggers': {
+        'batch_api': {
+            'handlers': ['console'],
+            'level': BATCH_LOG_LEVEL,
+            'propagate': False,
+        },
+        'batch_api.records': {
+            'handlers': ['console'],
+            'level': AEP_RECORD_LOG_LEVEL,
+            'filters': ['record_sampling'],
+            'propagate': False,
+        },
+    },
+}
+
+# AEP 요청 속도 제한 (토큰 버킷) 및 적응형 동시성 (429/5xx 시 AIMD 감소, Retry-After 준수)
+AEP_RATE_LIMIT_RPS = float(os.environ.get('AEP_RATE_LIMIT_RPS', '0'))  # 초당 최대 요청 수 (0: 제한 없음)
+AEP_RATE_LIMIT_BURST = int(os.environ.get('AEP_RATE_LIMIT_BURST', '0')) or None  # 순간 허용 요청 수 (미설정 시 RPS)
+AEP_ADAPTIVE_CONCURRENCY = os.environ.get('AEP_ADAPTIVE_CONCURRENCY', 'True') == 'True'
+AEP_MIN_CONCURRENCY = int(os.environ.get('AEP_MIN_CONCURRENCY', '1'))  # 최대값은 AEP_MAX_WORKERS
+AEP_MAX_RETRY_AFTER = float(os.environ.get('AEP_MAX_RETRY_AFTER', '60'))  # Retry-After 최대 대기 초
+
+# 일시적 실패 재시도 (지수 백오프 + full jitter)
+AEP_RETRY_MAX_RETRIES = int(os.environ.get('AEP_RETRY_MAX_RETRIES', '3'))  # 레코드당 최대 재시도 횟수
+AEP_RETRY_BASE_DELAY = float(os.environ.get('AEP_RETRY_BASE_DELAY', '0.5'))  # 첫 재시도 최대 대기 초
+AEP_RETRY_MAX_DELAY = float(os.environ.get('AEP_RETRY_MAX_DELAY', '10'))  # 재시도 대기 상한 초
+AEP_RETRY_STATUS_CODES = [408, 429, 500, 502, 503, 504]
+AEP_RETRY_BUDGET_MIN = int(os.environ.get('AEP_RETRY_BUDGET_MIN', '100'))  # 배치당 재시도 예산 = MIN + 대상 레코드 수 x RATIO
+AEP_RETRY_BUDGET_RATIO = float(os.environ.get('AEP_RETRY_BUDGET_RATIO', '0.1'))
+
+# 마지막으로 전송 성공한 페이로드와 해시가 같은 레코드는 전송하지 않고 생략 (BatchLog.skipped_count)
+AEP_SKIP_UNCHANGED = os.environ.get('AEP_SKIP_UNCHANGED', 'True') == 'True'
+
+# 전송 성공 플래그(is_sent) 반영 단위 - UPDATE 1회당 최대 id 수 (SQLite 변수 제한 999 이하 권장)
+BATCH_ACK_CHUNK_SIZE = int(os.environ.get('BATCH_ACK_CHUNK_SIZE', '500'))
+
+# 헬스 체크 레코드 수 스냅샷 캐시 시간 (초) - 배치 전송 시 미전송 수는 즉시 차감
+HEALTH_CACHE_TTL = int(os.environ.get('HEALTH_CACHE_TTL', '30'))
+
+# 캐시 - 웹 워커와 배치 커맨드/워커 프로세스가 같은 health 스냅샷을 보도록 프로세스 간 공유 백엔드 사용
+# (LocMemCache 는 프로세스마다 따로라 다른 프로세스의 전송/생성 반영이 보이지 않음, 여러 서버면 Redis 등으로 변경)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+    }
+}
+
+# 샤드 배치 (run_sharded_batch)
+BATCH_SHARD_PROCESSES = int(os.environ.get('BATCH_SHARD_PROCESSES', '0'))  # 0: CPU 코어 수
+BATCH_CLAIM_LEASE_SECONDS = int(os.environ.get('BATCH_CLAIM_LEASE_SECONDS', '300'))  # 레코드 선점 유지 시간
+
+# 증분 동기화 (sync_batch) 기본 대상 이름 - 대상마다 워터마크를 따로 관리
+SYNC_DESTINATION = os.environ.get('SYNC_DESTINATION', 'aep')
+# 동기화 상한을 현재 시각보다 이만큼 앞으로 잡음 (초) - modified_at 은 저장 시각이라 커밋이 늦은
+# 트랜잭션의 변경이 워터마크 뒤로 밀려 누락되지 않도록, 가장 긴 쓰기 트랜잭션보다 길게 설정
+SYNC_SAFETY_LAG_SECONDS = float(os.environ.get('SYNC_SAFETY_LAG_SECONDS', '30'))
@@ -0,0 +1,133 @@
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import health, metrics
+from .models import Woo
+
+
+def iter_id_ranges(ids):
+    """정렬된 id 목록을 연속 구간 (start, end) 으로 묶어서 반환"""
+    start = end = None
+    for record_id in ids:
+        if start is None:
+            start = end = record_id
+        elif record_id == end + 1:
+            end = record_id
+        else:
+            yield start, end
+            start = end = record_id
+    if start is not None:
+        yield start, end
+
+
+class AckWriter:
+    """전송 성공한 레코드의 is_sent/sent_at/send_state 를 작은 트랜잭션 단위로 반영
+
+    add() 로 쌓인 id 가 chunk_size 에 도달하면 바로 flush 한다.
+    min_range 개 이상 연속된 id 는 id__range UPDATE 한 번으로, 나머지는 chunk_size 이하의
+    id__in UPDATE 로 나눠서 쓰므로 SQLite 변수 개수 제한에 걸리지 않고
+    쓰기 잠금도 짧게 유지된다. payload_hash 와 함께 add() 한 레코드는 레코드마다 값이 다르므로
+    같은 트랜잭션에서 id 별 UPDATE 를 executemany 로 쓴다.
+
+    token 이 주어지면 그 token 이 아직 선점 중인 (in_flight) 행만 반영하므로, 선점이 만료되어
+    다른 워커가 가져간 레코드를 전송 완료로 덮어쓰지 않는다.
+
+    include_sent 이면 (증분 동기화의 재전송) 이미 전송된 레코드도 반영하므로, 헬스 체크 미전송 수는
+    반영 전에 미전송이던 행 수만큼만 줄인다.
+    """
+
+    def __init__(self, chunk_size=None, min_range=32, token=None, include_sent=False):
+        self.chunk_size = max(1, int(chunk_size or getattr(settings, 'BATCH_ACK_CHUNK_SIZE', 500)))
+        self.min_range = max(2, int(min_range))
+        self.token = token
+        self.include_sent = include_sent
+        self.pending = []
+        self.hashes = {}
+        self.written = 0
+
+    def add(self, record_id, payload_hash=None):
+        if payload_hash is None:
+            self.pending.append(record_id)
+        else:
+            self.hashes[record_id] = payload_hash
+        if len(self.pending) + len(self.hashes) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """쌓인 id 를 DB에 반영하고 반영한 건수 반환"""
+        if not self.pending and not self.hashes:
+            return 0
+        hashes = self.hashes
+        ids = sorted(set(self.pending).difference(hashes))
+        self.pending = []
+        self.hashes = {}
+        values = {
+            'is_sent': True,
+            'sent_at': timezone.now(),
+            'send_state': Woo.SEND_STATE_SENT,
+            'claimed_by': None,
+            'claim_expires_at': None,
+        }
+
+        claimed = self._claimed_filter()
+        singles = []
+        count = 0
+        started = time.perf_counter()
+        with transaction.atomic():
+            unsent = self._count_unsent([*ids, *hashes], claimed) if self.include_sent else None
+            for start, end in iter_id_ranges(ids):
+                if end - start + 1 >= self.min_range:
+                    count += Woo.objects.filter(id__range=(start, end), **claimed).update(**values)
+                else:
+                    singles.extend(range(start, end + 1))
+            for offset in range(0, len(singles), self.chunk_size):
+                count += Woo.objects.filter(
+                    id__in=singles[offset:offset + self.chunk_size], **claimed
+                ).update(**values)
+            if hashes:
+                count += self._write_hashes(values, hashes)
+        metrics.record_db_update('ack', started)
+
+        health.record_sent(count if unsent is None else unsent)
+        self.written += count
+        return count
+
+    def _count_unsent(self, ids, claimed):
+        """반영 대상 중 아직 is_sent=False 인 행 수"""
+        return sum(
+            Woo.objects.filter(id__in=ids[offset:offset + self.chunk_size], is_sent=False, **claimed).count()
+            for offset in range(0, len(ids), self.chunk_size)
+        )
+
+    def _claimed_filter(self):
+        if self.token is None:
+            return {}
+        return {'claimed_by': self.token, 'send_state': Woo.SEND_STATE_IN_FLIGHT}
+
+    def _write_hashes(self, values, hashes):
+        """values 와 레코드별 payload_hash 를 id 별 UPDATE 로 반영하고 반영한 행 수 반환"""
+        quote = connection.ops.quote_name
+        fields = [Woo._meta.get_field(name) for name in (*values, 'payload_hash')]
+        assignments = ', '.join(f"{quote(field.column)} = %s" for field in fields)
+        where = [f"{quote(Woo._meta.pk.column)} = %s"]
+        claimed = self._claimed_filter()
+        where.extend(f"{quote(Woo._meta.get_field(name).column)} = %s" for name in claimed)
+        sql = f"UPDATE {quote(Woo._meta.db_table)} SET {assignments} WHERE {' AND '.join(where)}"
+        params = [field.get_db_prep_save(value, connection) for field, value in zip(fields, values.values())]
+        rows = [
+            (*params, payload_hash, record_id, *claimed.values())
+            for record_id, payload_hash in sorted(hashes.items())
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+            return cursor.rowcount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 예외로 중단되어도 이미 성공한 전송은 반영
+        self.flush()
@@ -0,0 +1,475 @@
+import gzip
+import hashlib
+import json
+import logging
+import time
+from json.encoder import encode_basestring
+from operator import itemgetter
+
+import requests
+from django.conf import settings
+
+from . import async_http_client, http_client, json_backend, metrics
+from .log import record_logger, LazyText
+from .throttle import get_max_retry_after, parse_retry_after
+
+
+def transform_to_aep_format(db_record):
+    """DB 레코드를 AEP 포맷으로 변환 - header/body 구조"""
+    tenant_key = settings.AEP_TENANT_ID.strip('_')
+    
+    return {
+        "header": {
+            "schemaRef": {
+                "id": settings.AEP_SCHEMA_ID,
+                "contentType": "application/vnd.adobe.xed-full+json;version=1"
+            },
+            "imsOrgId": settings.AEP_IMS_ORG_ID,
+            "datasetId": settings.AEP_DATASET_ID,
+            "source": {
+                "name": "Batch API Source"
+            }
+        },
+        "body": {
+            "xdmMeta": {
+                "schemaRef": {
+                    "id": settings.AEP_SCHEMA_ID,
+                    "contentType": "application/vnd.adobe.xed-full+json;version=1"
+                }
+            },
+            "xdmEntity": {
+                "_id": db_record.get('_id'),
+                "identityMap": {
+                    "crmId": [
+                        {
+                            "id": db_record.get('_id')
+                        }
+                    ],
+                    "id": [
+                        {
+                            "id": db_record.get('_id')
+                        }
+                    ]
+                },
+                f"_{tenant_key}": {
+                    "TEST_ID": db_record.get('id'),
+                    "TEST_NAME": db_record.get('name'),
+                    "identification": {
+                        "core": {
+                            "email": db_record.get('email'),
+                            "phoneNumber": db_record.get('phone'),
+                            "crmId": db_record.get('_id')
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+
+# ===========================
+# 컴파일된 페이로드 템플릿
+# ===========================
+
+# render_row() 가 받는 values_list() 튜플의 필드 순서
+RECORD_FIELDS = ('id', 'email', 'phone', 'name', '_id')
+
+
+def _encode_value(value):
+    """JSON 값 1개를 문자열로 인코딩"""
+    if value.__class__ is str:
+        return encode_basestring(value)
+    if value is None:
+        return 'null'
+    return json.dumps(value, ensure_ascii=False)
+
+
+class PayloadTemplate:
+    """transform_to_aep_format() 결과를 미리 직렬화해 둔 템플릿
+
+    header/xdmMeta 등 정적인 부분은 생성 시 한 번만 JSON 으로 만들고,
+    레코드마다 바뀌는 필드만 그 사이에 끼워 넣어 compact JSON bytes 를 만든다.
+    """
+
+    def __init__(self):
+        # 필드 자리에 표식 문자열을 넣어 변환한 뒤, 표식 위치로 JSON 을 조각낸다
+        markers = {field: f"\x00{index}\x00" for index, field in enumerate(RECORD_FIELDS)}
+        serialized = json.dumps(
+            transform_to_aep_format(markers),
+            ensure_ascii=False,
+            separators=(',', ':')
+        )
+
+        parts = []
+        slots = []
+        rest = serialized
+        while True:
+            start = rest.find('"\\u0000')
+            if start < 0:
+                break
+            end = rest.index('\\u0000"', start + 7)
+            parts.append(rest[:start])
+            slots.append(int(rest[start + 7:end]))
+            rest = rest[end + 7:]
+        parts.append(rest)
+
+        # 정적 조각은 % 포맷 문자열로, 필드 자리는 한 번씩만 인코딩해서 재사용
+        self.format = '%s'.join(part.replace('%', '%%') for part in parts)
+        self.pick = itemgetter(*slots)
+        self.width = len(RECORD_FIELDS)
+
+    def render_row(self, row):
+        """values_list(*RECORD_FIELDS) 튜플 -> 페이로드 JSON bytes"""
+        values = [_encode_value(value) for value in row[:self.width]]
+        return (self.format % self.pick(values)).encode('utf-8')
+
+    def render(self, db_record):
+        """dict 레코드 -> 페이로드 JSON bytes"""
+        return self.render_row(tuple(db_record.get(field) for field in RECORD_FIELDS))
+
+
+_template_cache = {}
+
+
+def get_payload_template():
+    """현재 AEP 설정에 대한 PayloadTemplate (설정 값이 같으면 재사용)"""
+    key = (
+        settings.AEP_SCHEMA_ID,
+        settings.AEP_IMS_ORG_ID,
+        settings.AEP_DATASET_ID,
+        settings.AEP_TENANT_ID,
+    )
+    template = _template_cache.get(key)
+    if template is None:
+        template = _template_cache[key] = PayloadTemplate()
+    return template
+
+
+def render_payload(row):
+    """values_list 튜플을 AEP 페이로드 JSON bytes 로 변환 (전송 hot path 용)"""
+    started = time.perf_counter()
+    payload = get_payload_template().render_row(row)
+    metrics.record_transform(started)
+    return payload
+
+
+# 전송 대상 레코드 튜플 - RECORD_FIELDS 뒤에 마지막으로 전송 성공한 페이로드 해시
+SEND_FIELDS = RECORD_FIELDS + ('payload_hash',)
+
+
+def payload_digest(payload):
+    """페이로드 JSON bytes 의 해시 (32자 hex) - Woo.payload_hash 와 비교"""
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def is_skip_unchanged():
+    """settings.AEP_SKIP_UNCHANGED - 마지막 전송과 같은 페이로드는 전송 생략"""
+    return bool(getattr(settings, 'AEP_SKIP_UNCHANGED', True))
+
+
+def is_gzip_enabled():
+    """settings.AEP_GZIP_ENABLED - 요청 본문 gzip 압축 여부"""
+    return bool(getattr(settings, 'AEP_GZIP_ENABLED', False))
+
+
+def build_request(body):
+    """AEP 요청 (headers, data) - AEP_GZIP_ENABLED 이고 본문이 AEP_GZIP_MIN_BYTES 이상이면 gzip 압축"""
+    headers = {
+        'Content-Type': 'application/json',
+        'x-gw-ims-org-id': settings.AEP_IMS_ORG_ID,
+    }
+    if is_gzip_enabled() and len(body) >= int(getattr(settings, 'AEP_GZIP_MIN_BYTES', 512)):
+        # mtime=0 이면 zlib 한 번으로 압축 (헤더 시각도 고정)
+        body = gzip.compress(body, compresslevel=int(getattr(settings, 'AEP_GZIP_LEVEL', 6)), mtime=0)
+        headers['Content-Encoding'] = 'gzip'
+    return headers, body
+
+
+def _mock_result():
+    return {
+        'success': True,
+        'status_code': 200,
+        'response': 'MOCK MODE: Data not actually sent to AEP',
+        'mock': True
+    }
+
+
+def _prepare_single(payload):
+    """단건 요청 (endpoint, headers, data) - payload 는 dict 또는 직렬화된 JSON bytes"""
+    aep_endpoint = settings.AEP_STREAMING_ENDPOINT
+    
+    if not isinstance(payload, bytes):
+        payload = json_backend.dumps(payload)
+    
+    headers, data = build_request(payload)
+    
+    if record_logger.isEnabledFor(logging.DEBUG):
+        record_logger.debug(
+            "event=aep_send endpoint=%s bytes=%d wire_bytes=%d payload=%s",
+            aep_endpoint, len(payload), len(data), LazyText(payload)
+        )
+    return aep_endpoint, headers, data
+
+
+def _retry_after_fields(response):
+    """실패 응답의 Retry-After -> 결과 dict 에 넣을 항목
+
+    AEP_MAX_RETRY_AFTER 를 넘는 대기는 그 값으로 줄이고 재시도하지 않도록 retryable=False 를 붙인다
+    (워커가 선점을 잡은 채 오래 멈추지 않도록).
+    """
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    max_retry_after = get_max_retry_after()
+    if retry_after is not None and retry_after > max_retry_after:
+        return {'retry_after': max_retry_after, 'retryable': False}
+    return {'retry_after': retry_after}
+
+
+def _single_result(response):
+    """단건 요청 응답 -> 결과 dict (requests.Response / async_http_client.Response 공통)"""
+    if response.status_code in [200, 201, 202]:
+        if record_logger.isEnabledFor(logging.DEBUG):
+            record_logger.debug(
+                "event=aep_response status=%d body=%s",
+                response.status_code, LazyText(response.content)
+            )
+        return {
+            'success': True,
+            'status_code': response.status_code,
+            'response': response.text
+        }
+    else:
+        record_logger.warning(
+            "event=aep_error status=%d body=%s",
+            response.status_code, LazyText(response.content)
+        )
+        return {
+            'success': False,
+            'status_code': response.status_code,
+            'error': response.text,
+            **_retry_after_fields(response)
+        }
+
+
+def _exception_result(e):
+    record_logger.warning("event=aep_exception error=%s", e)
+    return {
+        'success': False,
+        'error': str(e),
+        'error_class': e.__class__.__name__
+    }
+
+
+def send_to_aep(payload):
+    """AEP로 데이터 전송 - payload 는 dict 또는 직렬화된 JSON bytes"""
+    if getattr(settings, 'AEP_MOCK_MODE', True):
+        record_logger.debug("event=aep_send mock=true")
+        return _mock_result()
+    
+    aep_endpoint, headers, data = _prepare_single(payload)
+    
+    try:
+        response = http_client.post(
+            aep_endpoint,
+            headers=headers,
+            data=data
+        )
+    except requests.exceptions.RequestException as e:
+        return _exception_result(e)
+    return _single_result(response)
+
+
+async def asend_to_aep(payload):
+    """send_to_aep() 의 async 버전 - 공유 aiohttp 세션으로 전송"""
+    if getattr(settings, 'AEP_MOCK_MODE', True):
+        record_logger.debug("event=aep_send mock=true")
+        return _mock_result()
+    
+    aep_endpoint, headers, data = _prepare_single(payload)
+    
+    try:
+        response = await async_http_client.post(
+            aep_endpoint,
+            headers=headers,
+            data=data
+        )
+    except async_http_client.TRANSPORT_ERRORS as e:
+        return _exception_result(e)
+    return _single_result(response)
+
+
+# ===========================
+# Batch 모드 (여러 메시지를 1회 요청으로 전송)
+# ===========================
+
+BATCH_ENVELOPE_BYTES = len(b'{"messages":[]}')
+
+
+def is_batch_mode():
+    """settings.AEP_BATCH_MODE 활성화 여부"""
+    return bool(getattr(settings, 'AEP_BATCH_MODE', False))
+
+
+def get_batch_endpoint():
+    """Batch 엔드포인트 - 미설정 시 Streaming 엔드포인트에서 유도"""
+    endpoint = getattr(settings, 'AEP_BATCH_ENDPOINT', None)
+    if endpoint:
+        return endpoint
+    return settings.AEP_STREAMING_ENDPOINT.replace('/collection/', '/collection/batch/', 1)
+
+
+def iter_message_batches(records, max_messages=None, max_bytes=None):
+    """values_list 튜플을 변환해 메시지 개수/바이트 상한 내에서 묶음 단위로 반환
+
+    각 묶음은 [(row, encoded_message), ...] 리스트.
+    단일 메시지가 max_bytes 를 넘으면 그 메시지만 단독 묶음으로 보낸다.
+    """
+    max_messages = max_messages or int(getattr(settings, 'AEP_BATCH_MAX_MESSAGES', 100))
+    max_bytes = max_bytes or int(getattr(settings, 'AEP_BATCH_MAX_BYTES', 1000000))
+
+    render_row = get_payload_template().render_row
+
+    batch = []
+    batch_bytes = BATCH_ENVELOPE_BYTES
+    for record in records:
+        started = time.perf_counter()
+        encoded = render_row(record)
+        metrics.record_transform(started)
+        size = len(encoded) + 1  # 구분자 ','
+
+        if batch and (len(batch) >= max_messages or batch_bytes + size > max_bytes):
+            yield batch
+            batch = []
+            batch_bytes = BATCH_ENVELOPE_BYTES
+
+        batch.append((record, encoded))
+        batch_bytes += size
+
+    if batch:
+        yield batch
+
+
+def _message_result(message_response):
+    """Batch 응답의 메시지별 항목을 send_to_aep 와 같은 결과 형식으로 변환"""
+    if not isinstance(message_response, dict):
+        return {'success': False, 'error': 'No response for message'}
+
+    status = message_response.get('status')
+    if status is not None:
+        try:
+            status = int(status)
+        except (TypeError, ValueError):
+            # 해석할 수 없는 상태 값은 이 메시지만 실패로 처리
+            return {
+                'success': False,
+                'error': f"Invalid message status: {status!r}"
+            }
+    if status is None or 200 <= status < 300:
+        return {
+            'success': True,
+            'status_code': status or 200,
+            'response': message_response.get('xactionId')
+        }
+    return {
+        'success': False,
+        'status_code': status,
+        'error': message_response.get('message') or json_backend.dumps_str(message_response)
+    }
+
+
+def _prepare_batch(messages):
+    """Batch 요청 (endpoint, headers, data)"""
+    aep_endpoint = get_batch_endpoint()
+
+    body = b'{"messages":[' + b','.join(messages) + b']}'
+    headers, data = build_request(body)
+
+    record_logger.debug(
+        "event=aep_batch_send endpoint=%s messages=%d bytes=%d wire_bytes=%d",
+        aep_endpoint, len(messages), len(body), len(data)
+    )
+    return aep_endpoint, headers, data
+
+
+def _batch_results(response, count):
+    """Batch 요청 응답 -> 메시지 count 건의 결과 리스트 (requests.Response / async_http_client.Response 공통)"""
+    if response.status_code not in [200, 201, 202, 207]:
+        record_logger.warning(
+            "event=aep_batch_error status=%d messages=%d body=%s",
+            response.status_code, count, LazyText(response.content)
+        )
+        retry_after = _retry_after_fields(response)
+        return [{
+            'success': False,
+            'status_code': response.status_code,
+            'error': response.text,
+            **retry_after
+        } for _ in range(count)]
+
+    try:
+        message_responses = json_backend.loads(response.content).get('responses') or []
+    except ValueError:
+        message_responses = []
+
+    # 메시지별 응답이 없으면 요청 전체 성공으로 간주
+    if not message_responses:
+        return [{
+            'success': True,
+            'status_code': response.status_code,
+            'response': response.text
+        } for _ in range(count)]
+
+    return [
+        _message_result(message_responses[i] if i < len(message_responses) else None)
+        for i in range(count)
+    ]
+
+
+def _batch_exception_results(e, count):
+    record_logger.warning("event=aep_batch_exception messages=%d error=%s", count, e)
+    return [{
+        'success': False,
+        'error': str(e),
+        'error_class': e.__class__.__name__
+    } for _ in range(count)]
+
+
+def send_batch_to_aep(messages):
+    """인코딩된 메시지 목록을 Batch 요청 1회로 전송하고 메시지별 결과 리스트 반환
+
+    응답의 responses[i] 가 messages[i] 에 대응한다.
+    HTTP 오류나 예외가 발생하면 모든 메시지를 실패로 처리한다.
+    """
+    if getattr(settings, 'AEP_MOCK_MODE', True):
+        record_logger.debug("event=aep_batch_send mock=true messages=%d", len(messages))
+        return [_mock_result() for _ in messages]
+
+    aep_endpoint, headers, data = _prepare_batch(messages)
+
+    try:
+        response = http_client.post(
+            aep_endpoint,
+            headers=headers,
+            data=data
+        )
+    except requests.exceptions.RequestException as e:
+        return _batch_exception_results(e, len(messages))
+    return _batch_results(response, len(messages))
+
+
+async def asend_batch_to_aep(messages):
+    """send_batch_to_aep() 의 async 버전 - 공유 aiohttp 세션으로 전송"""
+    if getattr(settings, 'AEP_MOCK_MODE', True):
+        record_logger.debug("event=aep_batch_send mock=true messages=%d", len(messages))
+        return [_mock_result() for _ in messages]
+
+    aep_endpoint, headers, data = _prepare_batch(messages)
+
+    try:
+        response = await async_http_client.post(
+            aep_endpoint,
+            headers=headers,
+            data=data
+        )
+    except async_http_client.TRANSPORT_ERRORS as e:
+        return _batch_exception_results(e, len(messages))
+    return _batch_results(response, len(messages))
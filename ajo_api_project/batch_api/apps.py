@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class BatchApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'batch_api'
+
+    def ready(self):
+        from .db import on_connection_created
+        connection_created.connect(on_connection_created, dispatch_uid='batch_api_sqlite_pragmas')
+
+        # 재시작 전에 남은 QUEUED/중단된 작업을 웹 프로세스 내 워커로 이어서 실행
+        # (ready() 에서는 DB 를 조회하지 않고 - migrate 등 관리 커맨드에서도 호출됨 - 첫 요청에서 확인)
+        if getattr(settings, 'BATCH_INLINE_WORKER', True):
+            from .jobs import resume_jobs_on_first_request
+            request_started.connect(resume_jobs_on_first_request, dispatch_uid='batch_api_resume_jobs')
@@ -0,0 +1,122 @@
+import asyncio
+import atexit
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .http_client import get_pool_size, get_timeout
+from .throttle import get_throttle
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# async 전송에서 실패 결과로 바꾸는 예외 (연결/타임아웃)
+TRANSPORT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError) if aiohttp is not None else ()
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+_session = None
+
+
+def is_async_send():
+    """settings.AEP_ASYNC_SEND - 배치 전송을 스레드 대신 공유 이벤트 루프의 async 요청으로 처리"""
+    if not getattr(settings, 'AEP_ASYNC_SEND', False):
+        return False
+    if aiohttp is None:
+        raise ValueError("AEP_ASYNC_SEND requires aiohttp (pip install aiohttp)")
+    return True
+
+
+class Response:
+    """본문까지 읽어 둔 aiohttp 응답 - send_to_aep 결과 처리가 쓰는 requests.Response 속성만 제공"""
+
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+def build_session(pool_size=None):
+    """keep-alive 커넥션 풀을 가진 aiohttp.ClientSession 생성 (이벤트 루프 안에서 호출)"""
+    pool_size = pool_size or get_pool_size()
+    connect, read = get_timeout()
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=pool_size),
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read),
+    )
+
+
+def get_session():
+    """이벤트 루프 전역 공유 세션 (루프 안에서 최초 호출 시 생성)"""
+    global _session
+    if _session is None:
+        _session = build_session()
+    return _session
+
+
+def get_loop():
+    """프로세스 전역 이벤트 루프 (데몬 스레드에서 실행, 최초 호출 시 시작)
+
+    fork 된 자식 프로세스에는 루프 스레드가 없으므로 pid 가 바뀌면 새로 만든다.
+    """
+    global _loop, _loop_pid, _session
+    if _loop is None or _loop_pid != os.getpid():
+        with _loop_lock:
+            if _loop is None or _loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='aep-async', daemon=True).start()
+                _session = None
+                _loop, _loop_pid = loop, os.getpid()
+                atexit.register(close_session)
+    return _loop
+
+
+def submit(coro):
+    """코루틴을 공유 이벤트 루프에서 실행하고 concurrent.futures.Future 반환 (어느 스레드에서나 호출 가능)"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+async def _close_session():
+    global _session
+    if _session is not None:
+        session, _session = _session, None
+        await session.close()
+
+
+def close_session():
+    """공유 세션 종료 (설정 변경 후 재생성이 필요할 때)"""
+    if _loop is not None and _loop_pid == os.getpid() and _loop.is_running():
+        submit(_close_session()).result(timeout=5)
+
+
+async def post(url, **kwargs):
+    """공유 세션으로 POST 요청 후 본문까지 읽은 Response 반환 - async 전송은 모두 이 함수를 거친다
+
+    http_client.post() 와 같은 AEPThrottle 슬롯/토큰을 이벤트 루프를 막지 않고 기다린다.
+    """
+    throttle = get_throttle()
+    waited = time.perf_counter()
+    ticket = await throttle.aacquire()
+    started = metrics.start_aep_request(waited)
+    try:
+        async with get_session().post(url, **kwargs) as response:
+            response = Response(response.status, response.headers, await response.read())
+    except Exception as e:
+        metrics.finish_aep_request(started)
+        throttle.release(ticket, error=e)
+        raise
+    metrics.finish_aep_request(started, response.status_code)
+    throttle.release(ticket, response=response)
+    return response
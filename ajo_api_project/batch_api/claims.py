@@ -0,0 +1,276 @@
+import math
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import health, metrics
+from .aep import SEND_FIELDS
+from .http_client import get_timeout
+from .models import BatchRecordFailure, Woo
+
+
+def get_lease_seconds():
+    """선점 유지 시간 초 (settings.BATCH_CLAIM_LEASE_SECONDS) - 만료된 선점은 다른 워커가 가져갈 수 있다
+
+    요청 1회 (connect + read 타임아웃) 의 2배보다 짧으면 ClaimLease 가 보낼 수 있는 시간이 없으므로 그 값으로 올린다.
+    """
+    return max(1, int(getattr(settings, 'BATCH_CLAIM_LEASE_SECONDS', 300)), math.ceil(2 * sum(get_timeout())))
+
+
+class ClaimLease:
+    """token 으로 선점한 청크의 선점 만료 관리
+
+    선점/연장할 때 DB 에 쓰는 claim_expires_at 보다 먼저 끝나는 메모리 만료 시각 (monotonic) 을 함께 두고,
+    전송 스레드는 is_sendable() 로 요청 1회를 끝낼 시간 (margin) 이 남았을 때만 보낸다.
+    메인 스레드는 결과를 받을 때마다 renew() 를 호출해 유지 시간의 1/3 이 지나면 만료 시각을 연장한다.
+    """
+
+    def __init__(self, token, seconds=None, margin=None):
+        self.token = token
+        self.seconds = seconds or get_lease_seconds()
+        self.margin = sum(get_timeout()) if margin is None else margin
+        self.deadline = 0.0
+        self.renewed_at = 0.0
+
+    def start(self):
+        """선점/연장 직전에 호출 - 메모리 만료 시각을 갱신하고 DB 에 쓸 만료 시각 반환"""
+        self.renewed_at = time.monotonic()
+        self.deadline = self.renewed_at + self.seconds
+        return timezone.now() + timedelta(seconds=self.seconds)
+
+    def is_sendable(self):
+        """만료 전에 요청 1회를 끝낼 시간이 남았는지 (전송 스레드에서 호출)"""
+        return time.monotonic() + self.margin < self.deadline
+
+    def renew(self, min_id, max_id):
+        """[min_id, max_id] 중 token 이 선점 중인 레코드의 만료 시각 연장 후 연장한 건수 반환
+
+        유지 시간의 1/3 이 지나지 않았으면 아무것도 하지 않는다. 이미 만료되었으면 다른 워커가
+        가져갔을 수 있으므로 연장하지 않고, 남은 레코드는 is_sendable() 이 False 라 보내지 않는다.
+        """
+        now = time.monotonic()
+        if now >= self.deadline or now - self.renewed_at < self.seconds / 3:
+            return 0
+        started = time.perf_counter()
+        count = Woo.objects.filter(
+            claimed_by=self.token, send_state=Woo.SEND_STATE_IN_FLIGHT, id__range=(min_id, max_id)
+        ).update(claim_expires_at=self.start())
+        metrics.record_db_update('renew', started)
+        return count
+
+
+def _expires_at(lease, now):
+    return lease.start() if lease is not None else now + timedelta(seconds=get_lease_seconds())
+
+
+def new_claim_token(prefix='worker'):
+    """워커 식별용 선점 토큰"""
+    return f"{prefix}_{uuid.uuid4().hex[:12]}"
+
+
+def supports_update_returning():
+    """UPDATE ... RETURNING 지원 여부 (PostgreSQL, SQLite 3.35+)"""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+def _claimable(now, include_sent=False):
+    """선점 가능한 레코드 - 미전송이면서 다른 워커가 선점 중이 아니거나 선점이 만료된 것
+
+    include_sent 이면 이미 전송된 레코드도 포함한다 (증분 동기화의 변경 재전송).
+    """
+    free = ~Q(send_state=Woo.SEND_STATE_IN_FLIGHT) | Q(claim_expires_at__lt=now)
+    return free if include_sent else Q(is_sent=False) & free
+
+
+def _columns():
+    quote = connection.ops.quote_name
+    return quote(Woo._meta.db_table), {name: quote(Woo._meta.get_field(name).column) for name in (
+        'id', 'is_sent', 'send_state', 'claimed_by', 'claim_expires_at', *SEND_FIELDS
+    )}
+
+
+def _claimable_sql(column, now, include_sent=False):
+    """_claimable() 과 같은 조건의 SQL 조각과 파라미터
+
+    미전송 조건은 바인드 파라미터가 아닌 리터럴 NOT is_sent 로 쓴다 - SQLite 는 조건이 부분 인덱스
+    woo_unsent_idx (WHERE NOT is_sent) 정의와 같은 식일 때만 그 인덱스를 사용한다.
+    """
+    sql = f"({column['send_state']} <> %s OR {column['claim_expires_at']} < %s)"
+    params = [Woo.SEND_STATE_IN_FLIGHT, connection.ops.adapt_datetimefield_value(now)]
+    if include_sent:
+        return sql, params
+    return f"NOT {column['is_sent']} AND {sql}", params
+
+
+def _claim_returning(token, target_sql, target_params, now, expires_at, include_sent=False):
+    """UPDATE ... RETURNING 한 번으로 target_sql (id 서브쿼리 또는 목록) 중 선점 가능한 레코드를 선점하고 받아옴"""
+    table, column = _columns()
+    claimable, claimable_params = _claimable_sql(column, now, include_sent)
+
+    # 바깥 WHERE 에도 선점 조건을 두어 동시에 같은 행을 고른 경우 먼저 갱신한 쪽만 가져간다
+    sql = (
+        f"UPDATE {table} SET {column['send_state']} = %s, {column['claimed_by']} = %s, "
+        f"{column['claim_expires_at']} = %s "
+        f"WHERE {claimable} AND {column['id']} IN ({target_sql}) "
+        f"RETURNING {', '.join(column[name] for name in SEND_FIELDS)}"
+    )
+    params = [
+        Woo.SEND_STATE_IN_FLIGHT, token, connection.ops.adapt_datetimefield_value(expires_at),
+        *claimable_params, *target_params,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return sorted(cursor.fetchall())
+
+
+def _next_claimable_sql(after_id, limit, max_id, now):
+    """after_id 다음 선점 가능한 id limit 개를 고르는 서브쿼리"""
+    table, column = _columns()
+    claimable, claimable_params = _claimable_sql(column, now)
+    upper = f" AND {column['id']} <= %s" if max_id is not None else ''
+    upper_params = [max_id] if max_id is not None else []
+    # PostgreSQL 은 다른 트랜잭션이 잡고 있는 행을 기다리지 않고 건너뜀
+    skip_locked = ' FOR UPDATE SKIP LOCKED' if connection.vendor == 'postgresql' else ''
+    sql = (
+        f"SELECT {column['id']} FROM {table} WHERE {claimable} AND {column['id']} > %s{upper} "
+        f"ORDER BY {column['id']} LIMIT %s{skip_locked}"
+    )
+    return sql, [*claimable_params, after_id, *upper_params, limit]
+
+
+def _claim_fallback(token, after_id, limit, max_id, now, expires_at):
+    """RETURNING 미지원 DB - 후보 id 를 고른 뒤 조건부 UPDATE 로 선점하고 token 으로 다시 조회"""
+    while True:
+        queryset = Woo.objects.filter(_claimable(now), id__gt=after_id)
+        if max_id is not None:
+            queryset = queryset.filter(id__lte=max_id)
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+
+        # 그 사이 다른 워커가 가져간 레코드는 조건에서 빠진다
+        id_range = (ids[0], ids[-1])
+        Woo.objects.filter(_claimable(now), id__range=id_range).update(
+            send_state=Woo.SEND_STATE_IN_FLIGHT, claimed_by=token, claim_expires_at=expires_at
+        )
+        records = list(
+            Woo.objects.filter(claimed_by=token, send_state=Woo.SEND_STATE_IN_FLIGHT, id__range=id_range)
+            .order_by('id').values_list(*SEND_FIELDS)
+        )
+        if records:
+            return records
+        # 후보를 모두 다른 워커가 가져갔으면 다음 구간에서 다시 시도
+        after_id = ids[-1]
+
+
+def claim_records(token, after_id=0, limit=1000, max_id=None, lease=None):
+    """after_id 다음부터 최대 limit 건의 미전송 레코드를 token 으로 선점 (pending/failed -> in_flight)
+
+    선점한 레코드는 SEND_FIELDS 순서의 튜플 목록으로 id 순 반환한다.
+    lease (ClaimLease) 가 주어지면 만료 시각을 lease 로 정한다.
+    """
+    started = time.perf_counter()
+    now = timezone.now()
+    expires_at = _expires_at(lease, now)
+    if supports_update_returning():
+        target_sql, target_params = _next_claimable_sql(after_id, limit, max_id, now)
+        records = _claim_returning(token, target_sql, target_params, now, expires_at)
+    else:
+        records = _claim_fallback(token, after_id, limit, max_id, now, expires_at)
+    metrics.record_fetch(started, len(records))
+    return records
+
+
+def claim_ids(token, ids, include_sent=False, lease=None):
+    """주어진 id 중 선점 가능한 미전송 레코드를 token 으로 선점하고 id 순 튜플 목록 반환
+
+    include_sent 이면 이미 전송된 레코드도 선점한다.
+    """
+    if not ids:
+        return []
+    started = time.perf_counter()
+    now = timezone.now()
+    expires_at = _expires_at(lease, now)
+    if supports_update_returning():
+        records = _claim_returning(
+            token, ', '.join(['%s'] * len(ids)), list(ids), now, expires_at, include_sent
+        )
+    else:
+        Woo.objects.filter(_claimable(now, include_sent), id__in=ids).update(
+            send_state=Woo.SEND_STATE_IN_FLIGHT, claimed_by=token, claim_expires_at=expires_at
+        )
+        records = list(
+            Woo.objects.filter(claimed_by=token, send_state=Woo.SEND_STATE_IN_FLIGHT, id__in=ids)
+            .order_by('id').values_list(*SEND_FIELDS)
+        )
+    metrics.record_fetch(started, len(records))
+    return records
+
+
+def iter_claimed_chunks(token, chunk_size, min_id=None, max_id=None, lease=None):
+    """[min_id, max_id] 범위의 미전송 레코드를 청크 단위로 선점하면서 순회"""
+    after_id = min_id - 1 if min_id is not None else 0
+    while True:
+        chunk = claim_records(token, after_id, chunk_size, max_id, lease)
+        if not chunk:
+            return
+        yield chunk
+        after_id = chunk[-1][0]
+
+
+def iter_claimed_failures(token, parent_pk, chunk_size, lease=None):
+    """parent 배치에서 실패한 레코드 중 아직 미전송인 것을 청크 단위로 선점하면서 순회
+
+    BatchRecordFailure 를 (batch, id) 인덱스 순서로 읽고 해당 Woo 만 id 로 선점하므로
+    Woo 테이블 크기와 관계없이 실패 건수에 비례한 시간이 걸린다.
+    """
+    after = 0
+    while True:
+        page = list(
+            BatchRecordFailure.objects.filter(batch_id=parent_pk, id__gt=after)
+            .order_by('id').values_list('id', 'woo_id')[:chunk_size]
+        )
+        if not page:
+            return
+        after = page[-1][0]
+        chunk = claim_ids(token, sorted({woo_id for _, woo_id in page}), lease=lease)
+        if chunk:
+            yield chunk
+
+
+def release_claims(token, min_id, max_id, state=Woo.SEND_STATE_PENDING):
+    """id 범위 안에서 token 으로 선점했지만 전송되지 않은 레코드를 state 로 되돌림 (다음 배치에서 다시 대상이 됨)"""
+    started = time.perf_counter()
+    count = Woo.objects.filter(
+        is_sent=False, claimed_by=token, send_state=Woo.SEND_STATE_IN_FLIGHT, id__range=(min_id, max_id)
+    ).update(send_state=state, claimed_by=None, claim_expires_at=None)
+    metrics.record_db_update('release', started)
+    return count
+
+
+def fail_claimed_ids(token, ids):
+    """token 으로 선점했지만 전송하지 못한 레코드를 미전송(failed) 으로 되돌림
+
+    이전에 전송된 적이 있는 레코드도 is_sent=False 가 되므로 이후 일반 배치나 재전송에서 다시 보낸다
+    (헬스 체크 미전송 수도 그만큼 늘림).
+    """
+    started = time.perf_counter()
+    claimed = Woo.objects.filter(claimed_by=token, send_state=Woo.SEND_STATE_IN_FLIGHT, id__in=ids)
+    values = {
+        'is_sent': False, 'send_state': Woo.SEND_STATE_FAILED, 'claimed_by': None, 'claim_expires_at': None,
+    }
+    with transaction.atomic():
+        unsent = claimed.filter(is_sent=True).update(**values)
+        count = unsent + claimed.filter(is_sent=False).update(**values)
+    metrics.record_db_update('release', started)
+    health.record_unsent(unsent)
+    return count
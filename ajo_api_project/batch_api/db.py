@@ -0,0 +1,21 @@
+from django.conf import settings
+
+
+def get_sqlite_pragmas():
+    """연결마다 적용할 SQLite PRAGMA (settings.SQLITE_PRAGMAS)"""
+    return getattr(settings, 'SQLITE_PRAGMAS', None) or {}
+
+
+def apply_sqlite_pragmas(cursor, pragmas=None):
+    """DB-API 커서에 PRAGMA 적용"""
+    pragmas = get_sqlite_pragmas() if pragmas is None else pragmas
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def on_connection_created(sender, connection, **kwargs):
+    """connection_created 시그널 - SQLite 연결이 열릴 때 성능 프로필 적용"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor)
@@ -0,0 +1,238 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+
+from django.conf import settings
+
+from . import async_http_client, metrics
+from .aep import (
+    RECORD_FIELDS, render_payload, send_to_aep, payload_digest, is_skip_unchanged,
+    is_batch_mode, iter_message_batches, send_batch_to_aep, asend_to_aep, asend_batch_to_aep,
+)
+from .retry import call_with_retry, call_batch_with_retry, acall_with_retry, acall_batch_with_retry
+
+
+def get_max_workers():
+    """동시 전송 워커 수 (settings.AEP_MAX_WORKERS)"""
+    return max(1, int(getattr(settings, 'AEP_MAX_WORKERS', 8)))
+
+
+def _run_job(job, handler):
+    """작업 1건 실행 (워커 스레드) - 예외는 실패 결과로 변환"""
+    try:
+        return handler(job)
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'error_class': e.__class__.__name__
+        }
+
+
+def _windowed(jobs, submit, max_workers):
+    """submit(job) 이 반환한 Future 를 최대 max_workers 개까지 진행시키고 완료되는 순서대로 (job, result) 반환"""
+    jobs = iter(jobs)
+    in_flight = {}
+
+    def submit_next():
+        for job in jobs:
+            in_flight[submit(job)] = job
+            metrics.DISPATCH_IN_FLIGHT.inc()
+            return True
+        return False
+
+    try:
+        # in-flight 작업 수를 max_workers 로 제한
+        for _ in range(max_workers):
+            if not submit_next():
+                break
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = in_flight.pop(future)
+                metrics.DISPATCH_IN_FLIGHT.dec()
+                yield job, future.result()
+                submit_next()
+    finally:
+        # 중단된 경우 남은 작업 수만큼 되돌림
+        metrics.DISPATCH_IN_FLIGHT.dec(len(in_flight))
+
+
+def dispatch(jobs, handler, max_workers=None):
+    """작업을 동시에 실행하고 완료되는 순서대로 (job, result)를 반환
+
+    워커 스레드는 변환/전송만 수행하고 DB에는 접근하지 않으므로
+    결과 집계와 DB 업데이트는 호출한 스레드에서 처리해야 한다.
+    진행 중인 작업 수는 max_workers 를 넘지 않는다.
+    """
+    max_workers = max_workers or get_max_workers()
+
+    if max_workers == 1:
+        for job in jobs:
+            yield job, _run_job(job, handler)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aep-send') as executor:
+        yield from _windowed(jobs, lambda job: executor.submit(_run_job, job, handler), max_workers)
+
+
+async def _arun_job(job, handler):
+    """작업 1건 실행 (이벤트 루프) - 예외는 실패 결과로 변환"""
+    try:
+        return await handler(job)
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'error_class': e.__class__.__name__
+        }
+
+
+def dispatch_async(jobs, handler, max_workers=None):
+    """dispatch() 와 같지만 handler 는 코루틴 함수이고 공유 이벤트 루프에서 실행
+
+    작업마다 스레드를 쓰지 않으므로 max_workers (AEP_MAX_WORKERS) 를 수백 단위로 올릴 수 있다.
+    """
+    max_workers = max_workers or get_max_workers()
+    yield from _windowed(
+        jobs, lambda job: async_http_client.submit(_arun_job(job, handler)), max_workers
+    )
+
+
+def _stored_hash(record):
+    """레코드 튜플의 마지막 전송 페이로드 해시 (SEND_FIELDS 순서가 아니면 None)"""
+    return record[len(RECORD_FIELDS)] if len(record) > len(RECORD_FIELDS) else None
+
+
+def _unchanged_result(digest):
+    """전송을 생략한 레코드의 결과"""
+    return {'success': True, 'skipped': True, 'payload_hash': digest}
+
+
+def _split_unchanged(batch, skip_unchanged):
+    """묶음을 (메시지별 결과 - 생략한 메시지만 채움, 보낼 메시지 [(index, encoded, digest)]) 로 분리"""
+    results = [None] * len(batch)
+    pending = []
+    for index, (record, encoded) in enumerate(batch):
+        digest = payload_digest(encoded)
+        if skip_unchanged and digest == _stored_hash(record):
+            results[index] = _unchanged_result(digest)
+        else:
+            pending.append((index, encoded, digest))
+    return results, pending
+
+
+def _lease_expired_result():
+    """선점 만료가 가까워 보내지 않은 레코드의 결과 (재시도 대상 아님)"""
+    return {
+        'success': False,
+        'error': 'Claim lease expired before send',
+        'error_class': 'LeaseExpired'
+    }
+
+
+def _lease_expired(lease):
+    return lease is not None and not lease.is_sendable()
+
+
+def _merge_sent(results, pending, sent):
+    """보낸 메시지의 결과를 묶음 순서 자리에 채워서 반환"""
+    for (index, _, digest), result in zip(pending, sent):
+        result['payload_hash'] = digest
+        results[index] = result
+    return results
+
+
+def _send_record(record, retry_policy=None, skip_unchanged=False, lease=None):
+    payload = render_payload(record)
+    digest = payload_digest(payload)
+    if skip_unchanged and digest == _stored_hash(record):
+        return _unchanged_result(digest)
+
+    # 재시도를 포함해 요청마다 선점이 유지되는지 확인
+    def send():
+        if _lease_expired(lease):
+            return _lease_expired_result()
+        return send_to_aep(payload)
+
+    result = call_with_retry(send, retry_policy)
+    result['payload_hash'] = digest
+    return result
+
+
+def _send_batch(batch, retry_policy=None, skip_unchanged=False, lease=None):
+    """묶음에서 페이로드가 바뀐 메시지만 전송하고 묶음 순서대로 메시지별 결과 반환"""
+    results, pending = _split_unchanged(batch, skip_unchanged)
+
+    def send(messages):
+        if _lease_expired(lease):
+            return [_lease_expired_result() for _ in messages]
+        return send_batch_to_aep(messages)
+
+    if pending:
+        sent = call_batch_with_retry(send, [encoded for _, encoded, _ in pending], retry_policy)
+        _merge_sent(results, pending, sent)
+    return results
+
+
+async def _asend_record(record, retry_policy=None, skip_unchanged=False, lease=None):
+    payload = render_payload(record)
+    digest = payload_digest(payload)
+    if skip_unchanged and digest == _stored_hash(record):
+        return _unchanged_result(digest)
+
+    async def send():
+        if _lease_expired(lease):
+            return _lease_expired_result()
+        return await asend_to_aep(payload)
+
+    result = await acall_with_retry(send, retry_policy)
+    result['payload_hash'] = digest
+    return result
+
+
+async def _asend_batch(batch, retry_policy=None, skip_unchanged=False, lease=None):
+    results, pending = _split_unchanged(batch, skip_unchanged)
+
+    async def send(messages):
+        if _lease_expired(lease):
+            return [_lease_expired_result() for _ in messages]
+        return await asend_batch_to_aep(messages)
+
+    if pending:
+        sent = await acall_batch_with_retry(send, [encoded for _, encoded, _ in pending], retry_policy)
+        _merge_sent(results, pending, sent)
+    return results
+
+
+def dispatch_records(records, max_workers=None, retry_policy=None, lease=None):
+    """values_list 튜플 레코드를 AEP로 전송하고 레코드별 (record, result)를 반환
+
+    AEP_BATCH_MODE 이면 여러 레코드를 Batch 요청 1회로 묶어 보내고,
+    메시지별 응답을 각 레코드의 결과로 풀어서 돌려준다.
+    retry_policy 가 있으면 일시적 실패를 재시도하며 result['attempts'] 에 시도 횟수를 남긴다.
+
+    결과의 result['payload_hash'] 는 보낸 페이로드의 해시이고, 레코드가 SEND_FIELDS 튜플이며
+    페이로드 해시가 마지막 전송과 같으면 (AEP_SKIP_UNCHANGED) 보내지 않고 result['skipped'] 로 반환한다.
+
+    AEP_ASYNC_SEND 이면 스레드 대신 공유 이벤트 루프에서 aiohttp 로 전송한다.
+    lease (ClaimLease) 가 주어지면 선점 만료 전에 끝낼 수 없는 요청은 보내지 않고 LeaseExpired 실패로 반환한다.
+    """
+    skip_unchanged = is_skip_unchanged()
+    if async_http_client.is_async_send():
+        run, send_record, send_batch = dispatch_async, _asend_record, _asend_batch
+    else:
+        run, send_record, send_batch = dispatch, _send_record, _send_batch
+
+    if not is_batch_mode():
+        handler = partial(send_record, retry_policy=retry_policy, skip_unchanged=skip_unchanged, lease=lease)
+        yield from run(records, handler, max_workers)
+        return
+
+    handler = partial(send_batch, retry_policy=retry_policy, skip_unchanged=skip_unchanged, lease=lease)
+    for batch, results in run(iter_message_batches(records), handler, max_workers):
+        if isinstance(results, dict):
+            # 요청 단위 예외 - 묶음 전체 실패
+            results = [results] * len(batch)
+        for (record, _), result in zip(batch, results):
+            yield record, result
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .models import BatchRecordFailure
+
+# 실패 행 하나에 저장하는 에러 메시지 최대 길이
+ERROR_MAX_LENGTH = 1000
+
+
+class FailureWriter:
+    """전송 실패 레코드를 모아서 BatchRecordFailure 로 bulk_create
+
+    add() 로 쌓인 실패가 chunk_size 에 도달하면 바로 flush 하므로 메모리에는 최대 chunk_size 건만 유지된다.
+    """
+
+    def __init__(self, batch_pk, chunk_size=None):
+        self.batch_pk = batch_pk
+        self.chunk_size = max(1, int(chunk_size or getattr(settings, 'BATCH_ACK_CHUNK_SIZE', 500)))
+        self.pending = []
+        self.written = 0
+
+    def add(self, record_id, result):
+        """send_to_aep/send_batch_to_aep 실패 결과 1건 추가"""
+        self.pending.append(BatchRecordFailure(
+            batch_id=self.batch_pk,
+            woo_id=record_id,
+            status_code=result.get('status_code'),
+            error_class=result.get('error_class'),
+            attempts=result.get('attempts', 1),
+            error=str(result.get('error', 'Unknown error'))[:ERROR_MAX_LENGTH],
+        ))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """쌓인 실패를 DB에 저장하고 저장한 건수 반환"""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        started = time.perf_counter()
+        BatchRecordFailure.objects.bulk_create(pending, batch_size=self.chunk_size)
+        metrics.record_db_update('failure', started)
+        self.written += len(pending)
+        return len(pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Woo
+
+TOTAL_KEY = 'batch_api:health:total_records'
+UNSENT_KEY = 'batch_api:health:unsent_records'
+CACHED_AT_KEY = 'batch_api:health:cached_at'
+
+
+def get_ttl():
+    """스냅샷 유지 시간 초 (settings.HEALTH_CACHE_TTL)"""
+    return int(getattr(settings, 'HEALTH_CACHE_TTL', 30))
+
+
+def refresh_snapshot():
+    """DB 에서 레코드 수를 다시 세어 스냅샷 저장 후 반환"""
+    snapshot = {
+        TOTAL_KEY: Woo.objects.count(),
+        UNSENT_KEY: Woo.objects.filter(is_sent=False).count(),
+        CACHED_AT_KEY: timezone.now().isoformat(),
+    }
+    cache.set_many(snapshot, get_ttl())
+    return snapshot
+
+
+async def arefresh_snapshot():
+    """refresh_snapshot() 의 async 버전"""
+    snapshot = {
+        TOTAL_KEY: await Woo.objects.acount(),
+        UNSENT_KEY: await Woo.objects.filter(is_sent=False).acount(),
+        CACHED_AT_KEY: timezone.now().isoformat(),
+    }
+    await cache.aset_many(snapshot, get_ttl())
+    return snapshot
+
+
+def _as_response(snapshot):
+    return {
+        'total_records': snapshot[TOTAL_KEY],
+        'unsent_records': snapshot[UNSENT_KEY],
+        'cached_at': snapshot[CACHED_AT_KEY],
+    }
+
+
+def get_snapshot():
+    """캐시된 레코드 수 스냅샷 - TTL 이 지났을 때만 DB 조회"""
+    snapshot = cache.get_many([TOTAL_KEY, UNSENT_KEY, CACHED_AT_KEY])
+    if len(snapshot) < 3:
+        snapshot = refresh_snapshot()
+    return _as_response(snapshot)
+
+
+async def aget_snapshot():
+    """get_snapshot() 의 async 버전"""
+    snapshot = await cache.aget_many([TOTAL_KEY, UNSENT_KEY, CACHED_AT_KEY])
+    if len(snapshot) < 3:
+        snapshot = await arefresh_snapshot()
+    return _as_response(snapshot)
+
+
+def _adjust(key, delta):
+    # 스냅샷이 없으면 다음 조회 때 새로 세므로 무시
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def record_sent(count):
+    """전송 완료 반영 - 미전송 수 감소"""
+    if count:
+        _adjust(UNSENT_KEY, -count)
+
+
+def record_unsent(count):
+    """전송 완료였던 레코드를 미전송으로 되돌림 반영 - 미전송 수 증가"""
+    if count:
+        _adjust(UNSENT_KEY, count)
+
+
+def record_created(count):
+    """레코드 생성 반영 - 전체/미전송 수 증가"""
+    if count:
+        _adjust(TOTAL_KEY, count)
+        _adjust(UNSENT_KEY, count)
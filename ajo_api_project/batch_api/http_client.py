@@ -0,0 +1,80 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from . import metrics
+from .throttle import get_throttle
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_pool_size():
+    """커넥션 풀 크기 (기본값: 동시 전송 워커 수)"""
+    return int(getattr(settings, 'AEP_HTTP_POOL_SIZE', None) or getattr(settings, 'AEP_MAX_WORKERS', 8))
+
+
+def get_timeout():
+    """(connect, read) 타임아웃 튜플"""
+    return (
+        float(getattr(settings, 'AEP_CONNECT_TIMEOUT', 3.05)),
+        float(getattr(settings, 'AEP_READ_TIMEOUT', 10)),
+    )
+
+
+def build_session(pool_size=None):
+    """keep-alive 커넥션 풀을 가진 requests.Session 생성"""
+    pool_size = pool_size or get_pool_size()
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_size,
+        pool_block=True,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def get_session():
+    """프로세스 전역 공유 세션 (최초 호출 시 생성)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def close_session():
+    """공유 세션 종료 (설정 변경 후 재생성이 필요할 때)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def post(url, **kwargs):
+    """공유 세션으로 POST 요청 - 모든 AEP 전송은 이 함수를 거친다
+
+    요청마다 AEPThrottle 슬롯/토큰을 얻고, 응답 코드와 Retry-After 로 동시성을 조정한다.
+    """
+    kwargs.setdefault('timeout', get_timeout())
+    throttle = get_throttle()
+    waited = time.perf_counter()
+    ticket = throttle.acquire()
+    started = metrics.start_aep_request(waited)
+    try:
+        response = get_session().post(url, **kwargs)
+    except Exception as e:
+        metrics.finish_aep_request(started)
+        throttle.release(ticket, error=e)
+        raise
+    metrics.finish_aep_request(started, response.status_code)
+    throttle.release(ticket, response=response)
+    return response
@@ -0,0 +1,217 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import Min, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .log import logger
+from .models import BatchLog
+from .pipeline import execute_batch
+
+_worker_thread = None
+_worker_wakeup = False
+_worker_lock = threading.Lock()
+
+
+def get_stale_seconds():
+    """heartbeat 가 이 초 이상 끊긴 RUNNING 작업은 중단된 것으로 봄 (settings.BATCH_JOB_STALE_SECONDS)"""
+    return max(1, int(getattr(settings, 'BATCH_JOB_STALE_SECONDS', 300)))
+
+
+class JobHeartbeat:
+    """with 블록 동안 백그라운드 스레드가 BatchLog.heartbeat_at 을 주기적으로 갱신
+
+    실행하던 프로세스가 죽어 heartbeat 가 끊긴 큐 작업은 claim_next_job 이 다른 워커에서 다시 실행한다.
+    """
+
+    def __init__(self, batch_log, interval=None):
+        self.batch_log = batch_log
+        self.interval = interval or get_stale_seconds() / 5
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.thread = threading.Thread(
+            target=self._run, name=f'batch-heartbeat-{self.batch_log.batch_id}', daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                now = timezone.now()
+                BatchLog.objects.filter(pk=self.batch_log.pk, status='RUNNING').update(heartbeat_at=now)
+                # 실행 스레드의 batch_log.save() 가 이전 값으로 되돌리지 않도록
+                self.batch_log.heartbeat_at = now
+            except DatabaseError as e:
+                logger.warning("event=heartbeat_failed batch=%s error=%s", self.batch_log.batch_id, e)
+            finally:
+                # 몇 분에 한 번 쓰는 연결을 스레드가 계속 붙잡고 있지 않도록 매번 닫음
+                connection.close()
+
+
+def stale_jobs():
+    """heartbeat 가 BATCH_JOB_STALE_SECONDS 이상 끊긴 RUNNING 큐 작업 (heartbeat 가 없으면 시작 시각 기준)
+
+    동기화/샤드 배치처럼 큐를 거치지 않은 로그는 execute_batch 로 다시 실행하면 안 되므로 제외한다.
+    """
+    cutoff = timezone.now() - timedelta(seconds=get_stale_seconds())
+    return BatchLog.objects.filter(status='RUNNING', from_queue=True).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+
+def enqueue_batch(parent=None):
+    """배치 작업을 DB 큐에 등록 (BatchLog status=QUEUED) 후 BatchLog 반환
+
+    parent 를 주면 그 배치의 실패 레코드만 재전송하는 배치가 된다.
+    """
+    return BatchLog.objects.create(
+        batch_id=f"batch_{uuid.uuid4().hex[:8]}",
+        status='QUEUED',
+        from_queue=True,
+        parent=parent
+    )
+
+
+def run_batch(progress=None, parent=None):
+    """배치를 현재 프로세스에서 바로 실행 (큐를 거치지 않음) 후 execute_batch 결과 반환
+
+    progress 는 execute_batch 로 그대로 전달된다 (청크마다 누적 통계 dict).
+    parent 를 주면 그 배치의 실패 레코드만 재전송한다.
+    """
+    batch_log = BatchLog.objects.create(
+        batch_id=f"batch_{uuid.uuid4().hex[:8]}",
+        status='RUNNING',
+        heartbeat_at=timezone.now(),
+        parent=parent
+    )
+    with JobHeartbeat(batch_log):
+        return execute_batch(batch_log, progress=progress)
+
+
+def submit_batch(parent=None):
+    """배치를 큐에 등록하고 웹 프로세스 내 워커를 깨운 뒤 BatchLog 반환"""
+    batch_log = enqueue_batch(parent=parent)
+    start_inline_worker()
+    return batch_log
+
+
+def claim_next_job():
+    """가장 오래된 QUEUED 작업 (없으면 heartbeat 가 끊긴 RUNNING 작업) 을 RUNNING 으로 전환하고 반환 (없으면 None)
+
+    status/heartbeat_at 조건부 UPDATE 로 선점하므로 여러 워커가 같은 작업을 가져가지 않는다.
+    """
+    while True:
+        job = BatchLog.objects.filter(status='QUEUED').order_by('started_at', 'id').first()
+        if job is None:
+            job = stale_jobs().order_by('started_at', 'id').first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = BatchLog.objects.filter(pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at).update(
+            status='RUNNING', heartbeat_at=now
+        )
+        if claimed:
+            if job.status == 'RUNNING':
+                logger.warning("event=job_takeover batch=%s heartbeat_at=%s", job.batch_id, job.heartbeat_at)
+            job.status = 'RUNNING'
+            job.heartbeat_at = now
+            return job
+
+
+def run_pending_jobs():
+    """큐가 빌 때까지 작업 실행, 실행한 작업 수 반환"""
+    count = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            return count
+        with JobHeartbeat(job):
+            execute_batch(job)
+        count += 1
+
+
+def run_worker(poll_interval=5, once=False):
+    """DB 큐 폴링 워커 (batch_worker 커맨드에서 사용)"""
+    while True:
+        close_old_connections()
+        run_pending_jobs()
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+def _inline_worker():
+    global _worker_thread, _worker_wakeup
+    try:
+        while True:
+            run_pending_jobs()
+            with _worker_lock:
+                # 큐를 비우는 사이 새 작업이 등록되었으면 한 번 더 처리
+                if not _worker_wakeup:
+                    return
+                _worker_wakeup = False
+    finally:
+        with _worker_lock:
+            if _worker_thread is threading.current_thread():
+                _worker_thread = None
+        connection.close()
+
+
+def start_inline_worker():
+    """웹 프로세스 안에서 백그라운드 워커 스레드 시작 (이미 실행 중이면 깨우기만 함)"""
+    global _worker_thread, _worker_wakeup
+    if not getattr(settings, 'BATCH_INLINE_WORKER', True):
+        return
+    with _worker_lock:
+        if _worker_thread is not None:
+            _worker_wakeup = True
+            return
+        _worker_wakeup = False
+        _worker_thread = threading.Thread(target=_inline_worker, name='batch-worker', daemon=True)
+        _worker_thread.start()
+
+
+def resume_pending_jobs():
+    """QUEUED 또는 heartbeat 가 끊긴 작업이 있으면 웹 프로세스 내 워커 시작
+
+    아직 끊겼다고 볼 수 없는 RUNNING 작업이 있으면 (재시작 전 프로세스가 실행하던 작업일 수 있음)
+    그 heartbeat 가 만료되는 시점에 다시 확인한다.
+    """
+    if BatchLog.objects.filter(status='QUEUED').exists() or stale_jobs().exists():
+        start_inline_worker()
+    cutoff = timezone.now() - timedelta(seconds=get_stale_seconds())
+    oldest = BatchLog.objects.filter(status='RUNNING', from_queue=True).annotate(
+        last_beat=Coalesce('heartbeat_at', 'started_at')
+    ).filter(last_beat__gte=cutoff).aggregate(oldest=Min('last_beat'))['oldest']
+    if oldest is not None:
+        delay = (oldest - cutoff).total_seconds() + 1
+        timer = threading.Timer(delay, _resume_later)
+        timer.daemon = True
+        timer.start()
+
+
+def _resume_later():
+    try:
+        resume_pending_jobs()
+    finally:
+        connection.close()
+
+
+def resume_jobs_on_first_request(sender, **kwargs):
+    """request_started 수신기 - 프로세스 시작 후 첫 요청에서 한 번만 resume_pending_jobs 실행"""
+    from django.core.signals import request_started
+
+    if request_started.disconnect(dispatch_uid='batch_api_resume_jobs'):
+        resume_pending_jobs()
@@ -0,0 +1,113 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+BACKENDS = ('orjson', 'msgspec', 'json')
+
+
+def available_backends():
+    """설치되어 사용 가능한 JSON 백엔드 목록 (우선순위 순)"""
+    installed = {'orjson': orjson, 'msgspec': msgspec, 'json': json}
+    return [name for name in BACKENDS if installed[name] is not None]
+
+
+def get_backend_name():
+    """settings.BATCH_JSON_BACKEND ('auto' 이면 설치된 가장 빠른 백엔드)"""
+    name = getattr(settings, 'BATCH_JSON_BACKEND', 'auto')
+    if name == 'auto':
+        return available_backends()[0]
+    if name not in available_backends():
+        raise ValueError(f"JSON backend '{name}' is not available")
+    return name
+
+
+# DjangoJSONEncoder 와 다르게 (마이크로초, +00:00) 직렬화하는 타입 - 백엔드와 관계없이 같은 문자열이 되도록 _default 로 변환
+DATETIME_TYPES = (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)
+
+
+def _default(obj):
+    """orjson/msgspec 가 모르는 타입 (과 날짜/시간) 은 DjangoJSONEncoder 규칙으로 변환"""
+    return DjangoJSONEncoder().default(obj)
+
+
+def _format_datetimes(obj):
+    """msgspec 은 날짜/시간에 enc_hook 을 부르지 않으므로 인코딩 전에 _default 형식 문자열로 바꿈"""
+    if isinstance(obj, dict):
+        return {key: _format_datetimes(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_format_datetimes(value) for value in obj]
+    if isinstance(obj, DATETIME_TYPES):
+        return _default(obj)
+    return obj
+
+
+def dumps(obj, indent=False, backend=None):
+    """obj -> UTF-8 JSON bytes (날짜/시간은 모든 백엔드에서 DjangoJSONEncoder 형식, 예: ...T10:00:00.998Z)"""
+    backend = backend or get_backend_name()
+
+    if backend == 'orjson':
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+    if backend == 'msgspec':
+        data = msgspec.json.encode(_format_datetimes(obj), enc_hook=_default)
+        return msgspec.json.format(data, indent=2) if indent else data
+
+    return json.dumps(
+        obj,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=None if indent else (',', ':'),
+    ).encode('utf-8')
+
+
+def dumps_str(obj, indent=False, backend=None):
+    """obj -> JSON 문자열 (TextField 저장용)"""
+    return dumps(obj, indent=indent, backend=backend).decode('utf-8')
+
+
+def loads(data, backend=None):
+    """JSON bytes/str -> 파이썬 객체 (잘못된 JSON 이면 ValueError)"""
+    backend = backend or get_backend_name()
+    if backend == 'orjson':
+        return orjson.loads(data)
+    if backend == 'msgspec':
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return json.loads(data)
+
+
+class JsonResponse(HttpResponse):
+    """django.http.JsonResponse 대체 - 설정된 JSON 백엔드로 직렬화
+
+    json_dumps_params 는 {'indent': ...} 만 지원한다.
+    """
+
+    def __init__(self, data, safe=True, json_dumps_params=None, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        indent = bool((json_dumps_params or {}).get('indent'))
+        super().__init__(content=dumps(data, indent=indent), **kwargs)
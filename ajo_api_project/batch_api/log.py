@@ -0,0 +1,33 @@
+import logging
+import random
+
+# 배치 단위 요약 로그 (청크/배치당 1줄)
+logger = logging.getLogger('batch_api')
+
+# 레코드/요청 단위 로그 - settings.LOGGING 에서 SamplingFilter 로 샘플링
+record_logger = logging.getLogger('batch_api.records')
+
+
+class SamplingFilter(logging.Filter):
+    """rate 비율의 로그 레코드만 통과 (1.0: 전부, 0: 없음)"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class LazyText:
+    """bytes 를 실제로 출력될 때만 디코딩 (비활성 로그에서 비용 0)"""
+
+    __slots__ = ('data', 'limit')
+
+    def __init__(self, data, limit=2000):
+        self.data = data
+        self.limit = limit
+
+    def __str__(self):
+        text = self.data.decode('utf-8', 'replace') if isinstance(self.data, bytes) else str(self.data)
+        return text if len(text) <= self.limit else text[:self.limit] + '...'
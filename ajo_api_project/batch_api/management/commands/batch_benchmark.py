@@ -0,0 +1,464 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from batch_api import http_client, json_backend
+from batch_api.db import apply_sqlite_pragmas
+from batch_api.aep import RECORD_FIELDS, build_request, get_payload_template, transform_to_aep_format
+from batch_api.claims import _next_claimable_sql
+from batch_api.models import BatchLog, Woo
+
+
+class StubAEPHandler(BaseHTTPRequestHandler):
+    """AEP Streaming 엔드포인트 흉내 - 요청 본문을 읽고 200 응답"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        body = b'{"inletId":"stub","xactionId":"stub"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """로컬 스텁 서버 시작 후 (server, url) 반환"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubAEPHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f'http://{host}:{port}/collection/stub'
+
+
+SAMPLE_RECORD = {
+    'id': 1,
+    'email': 'test00001@gmail.com',
+    'phone': '+821100000001',
+    'name': 'woo1',
+    '_id': 'woo1251024',
+}
+
+
+def sample_payload():
+    """벤치마크용 샘플 레코드의 AEP 페이로드"""
+    return transform_to_aep_format(SAMPLE_RECORD)
+
+
+def temp_db_path(prefix, directory=None):
+    """벤치마크용 임시 SQLite 파일 경로"""
+    fd, path = tempfile.mkstemp(suffix='.sqlite3', prefix=prefix, dir=directory)
+    os.close(fd)
+    return path
+
+
+def model_ddl():
+    """Django 가 SQLite 에 생성하는 것과 같은 DDL -> (테이블 SQL, 인덱스 SQL)"""
+    with connection.schema_editor(collect_sql=True) as editor:
+        editor.create_model(Woo)
+        editor.create_model(BatchLog)
+    statements = [sql.rstrip(';') for sql in editor.collected_sql]
+    table_sql = [sql for sql in statements if not sql.startswith('CREATE INDEX')]
+    index_sql = [sql for sql in statements if sql.startswith('CREATE INDEX')]
+    return table_sql, index_sql
+
+
+def sql_of(queryset, count=False):
+    """QuerySet -> sqlite3 에서 실행할 (sql, params)"""
+    sql, params = queryset.query.sql_with_params()
+    sql = sql.replace('%s', '?')
+    if count:
+        sql = f"SELECT COUNT(*) FROM ({sql})"
+    return sql, params
+
+
+def claim_sql(limit):
+    """claim_records 가 선점할 id 를 고르는 서브쿼리 -> sqlite3 에서 실행할 (sql, params)"""
+    sql, params = _next_claimable_sql(0, limit, None, timezone.now())
+    return sql.replace('%s', '?'), params
+
+
+def populate_synthetic_db(db, rows, unsent, batches=100000):
+    """Woo rows 건 (마지막 unsent 건은 미전송) + BatchLog batches 건 생성"""
+    db.execute(
+        """
+        INSERT INTO woo (id, email, phone, name, _id, createdby, modifiedby, is_sent, sent_at, send_state,
+                         modified_at)
+        WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+        SELECT n, 'test' || n || '@gmail.com', '+8211' || n, 'woo' || n, 'woo' || n || '251024',
+               '2025-10-24T00:00:00', '2025-10-24T00:00:00', n <= ?, NULL,
+               CASE WHEN n <= ? THEN 'sent' ELSE 'pending' END, '2025-10-24 00:00:00'
+        FROM seq
+        """,
+        (rows, rows - unsent, rows - unsent)
+    )
+    db.execute(
+        """
+        INSERT INTO batch_log (batch_id, total_records, success_count, fail_count, retry_count,
+                               skipped_count, status, error_message, started_at, completed_at)
+        WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+        SELECT 'batch_' || n, 5, 5, 0, 0, 0, 'SUCCESS', NULL,
+               datetime('2020-01-01', '+' || n || ' minutes'), NULL
+        FROM seq
+        """,
+        (batches,)
+    )
+    db.commit()
+
+
+def get_sqlite_pragmas_for_bench():
+    """SQLITE_PRAGMAS (SQLITE_PERFORMANCE_PROFILE 가 꺼져 있어도 비교를 위해 기본 프로필 사용)"""
+    from django.conf import settings
+    return settings.SQLITE_PRAGMAS or {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 10000,
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY',
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        '배치 파이프라인 성능 측정 (http: 커넥션 풀, transform: 페이로드 변환, json: 직렬화 백엔드, '
+        'gzip: 요청 본문 압축, index: 미전송 조회 인덱스, db: SQLite 동시 읽기/쓰기)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suite',
+            choices=['http', 'transform', 'json', 'gzip', 'index', 'db'],
+            help='측정 대상',
+        )
+        parser.add_argument(
+            '-n', '--iterations',
+            type=int,
+            default=None,
+            help='반복 횟수 (기본: http 2000, transform 1000000, json 200000, gzip 100000 레코드)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='동시 실행 스레드 수 (기본: 8)',
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=None,
+            help='index/db: 합성 Woo 레코드 수 (기본: index 10,000,000, db 1,000,000)',
+        )
+        parser.add_argument(
+            '--unsent',
+            type=int,
+            default=1000,
+            help='index: 그중 미전송 레코드 수 (기본: 1,000)',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=5,
+            help='db: 프로필별 측정 시간 초 (기본: 5)',
+        )
+        parser.add_argument(
+            '--db',
+            help='index: 합성 SQLite 파일 경로, db: DB를 만들 디렉터리 (기본: 임시 파일, 종료 시 삭제)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('=' * 60)
+        self.stdout.write(self.style.SUCCESS(f"Benchmark: {options['suite']}"))
+        self.stdout.write('=' * 60)
+        getattr(self, f"bench_{options['suite']}")(options)
+
+    def report(self, label, count, elapsed, unit='req'):
+        self.stdout.write(f"  {label:<32} {count / elapsed:>12,.0f} {unit}/s  ({elapsed:.2f}s)")
+
+    def bench_http(self, options):
+        """매 요청 새 연결(requests.post) vs 공유 커넥션 풀(http_client.post)"""
+        n = options['iterations'] or 2000
+        concurrency = options['concurrency']
+        payload = sample_payload()
+        server, url = start_stub_server()
+
+        def run(post):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for response in executor.map(lambda _: post(url, json=payload, timeout=10), range(n)):
+                    response.raise_for_status()
+            return time.perf_counter() - start
+
+        try:
+            self.stdout.write(f"  requests={n}, concurrency={concurrency}\n")
+            self.report('before: requests.post', n, run(requests.post))
+
+            session = http_client.build_session(pool_size=concurrency)
+            try:
+                self.report('after: pooled keep-alive session', n, run(session.post))
+            finally:
+                session.close()
+        finally:
+            server.shutdown()
+
+    def bench_transform(self, options):
+        """transform_to_aep_format + json.dumps vs 컴파일된 PayloadTemplate"""
+        n = options['iterations'] or 1000000
+        row = tuple(SAMPLE_RECORD[field] for field in RECORD_FIELDS)
+        self.stdout.write(f"  records={n}\n")
+
+        def run(transform):
+            start = time.perf_counter()
+            for _ in range(n):
+                transform()
+            return time.perf_counter() - start
+
+        self.report('before: dict only', n, run(
+            lambda: transform_to_aep_format(dict(zip(RECORD_FIELDS, row)))
+        ), unit='rec')
+        self.report('before: dict + json.dumps', n, run(
+            lambda: json.dumps(transform_to_aep_format(dict(zip(RECORD_FIELDS, row)))).encode('utf-8')
+        ), unit='rec')
+
+        render_row = get_payload_template().render_row
+        self.report('after: compiled template bytes', n, run(
+            lambda: render_row(row)
+        ), unit='rec')
+
+    def bench_json(self, options):
+        """JSON 백엔드별 페이로드/에러 목록 인코딩 처리량"""
+        n = options['iterations'] or 200000
+        payload = sample_payload()
+        errors = [{'record_id': i, 'error': 'Service Unavailable'} for i in range(10000)]
+        payload_bytes = len(json_backend.dumps(payload, backend='json'))
+        self.stdout.write(f"  payloads={n} ({payload_bytes} bytes), error list=10000 entries\n")
+
+        for backend in json_backend.available_backends():
+            start = time.perf_counter()
+            for _ in range(n):
+                json_backend.dumps(payload, backend=backend)
+            elapsed = time.perf_counter() - start
+            self.report(f'{backend}: payload', n, elapsed, unit='op')
+            self.stdout.write(f"  {'':<32} {n * payload_bytes / elapsed / 1e6:>12,.1f} MB/s")
+
+            rounds = max(1, n // 10000)
+            start = time.perf_counter()
+            for _ in range(rounds):
+                json_backend.dumps(errors, backend=backend)
+            self.report(f'{backend}: error list (10k)', rounds, time.perf_counter() - start, unit='op')
+
+    def bench_gzip(self, options):
+        """압축 끔/레벨별 단건·Batch 요청의 레코드당 전송 바이트와 압축 CPU 시간 (build_request 기준)"""
+        n = options['iterations'] or 100000
+        render_row = get_payload_template().render_row
+        messages = [
+            render_row((i, f'test{i:05d}@gmail.com', f'+8211{i:08d}', f'woo{i}', f'woo{i}251024'))
+            for i in range(1, n + 1)
+        ]
+        per_batch = int(getattr(settings, 'AEP_BATCH_MAX_MESSAGES', 100))
+        requests_by_mode = {
+            'single': messages,
+            f'batch x{per_batch}': [
+                b'{"messages":[' + b','.join(messages[i:i + per_batch]) + b']}'
+                for i in range(0, n, per_batch)
+            ],
+        }
+        self.stdout.write(
+            f"  records={n}, AEP_GZIP_MIN_BYTES={getattr(settings, 'AEP_GZIP_MIN_BYTES', 512)}\n"
+        )
+
+        for mode, bodies in requests_by_mode.items():
+            raw_bytes = sum(len(body) for body in bodies)
+            for level in (None, 1, 3, 6, 9):
+                with override_settings(AEP_GZIP_ENABLED=level is not None, AEP_GZIP_LEVEL=level or 6):
+                    start = time.process_time()
+                    wire_bytes = sum(len(build_request(body)[1]) for body in bodies)
+                    cpu = time.process_time() - start
+                label = f"{mode}: {'off' if level is None else f'gzip level {level}'}"
+                self.stdout.write(
+                    f"  {label:<32} {wire_bytes / n:>10,.1f} B/rec ({wire_bytes / raw_bytes:>6.1%})"
+                    f"  {cpu / n * 1e6:>8.2f} us/rec CPU"
+                )
+
+    def bench_index(self, options):
+        """합성 SQLite DB에서 인덱스 추가 전/후 미전송 조회, batch_list 쿼리 시간"""
+        rows = options['rows'] or 10000000
+        unsent = min(options['unsent'], rows)
+        path = options['db'] or temp_db_path('bench_index_')
+        table_sql, index_sql = model_ddl()
+
+        queries = [
+            ('health: unsent count', sql_of(Woo.objects.filter(is_sent=False).values('id'), count=True)),
+            ('fetch: first unsent chunk', sql_of(
+                Woo.objects.filter(is_sent=False, id__gt=0).order_by('id').values_list(*RECORD_FIELDS)[:1000]
+            )),
+            ('claim: next claimable ids', claim_sql(1000)),
+            ('batch_list: latest 20', sql_of(
+                BatchLog.objects.order_by('-started_at').values_list('batch_id', 'status')[:20]
+            )),
+        ]
+
+        db = sqlite3.connect(path)
+        try:
+            self.stdout.write(f"  db={path}\n  rows={rows:,}, unsent={unsent:,}\n")
+            for sql in table_sql:
+                db.execute(sql)
+
+            start = time.perf_counter()
+            populate_synthetic_db(db, rows, unsent)
+            self.stdout.write(f"  synthetic data: {time.perf_counter() - start:.1f}s\n")
+
+            def run_queries(label):
+                self.stdout.write(self.style.SUCCESS(f"  [{label}]"))
+                for name, (sql, params) in queries:
+                    timings = []
+                    for _ in range(3):
+                        start = time.perf_counter()
+                        db.execute(sql, params).fetchall()
+                        timings.append(time.perf_counter() - start)
+                    plan = '; '.join(row[-1] for row in db.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+                    self.stdout.write(f"  {name:<28} {min(timings) * 1000:>10.2f} ms  ({plan})")
+
+            run_queries('before: no indexes')
+
+            start = time.perf_counter()
+            for sql in index_sql:
+                db.execute(sql)
+            db.execute('ANALYZE')
+            db.commit()
+            self.stdout.write(f"\n  create indexes: {time.perf_counter() - start:.1f}s\n")
+
+            run_queries('after: woo_unsent_idx, batch_log_started_idx')
+        finally:
+            db.close()
+            if not options['db']:
+                os.remove(path)
+
+    def bench_db(self, options):
+        """배치 writer 1개 + 상태 폴링 reader N개 동시 실행 - 기본 SQLite vs SQLITE_PRAGMAS 프로필
+
+        --db 로 디렉터리를 주면 그 안에 DB를 만든다 (tmpfs 가 아닌 실제 디스크 측정용).
+        """
+        rows = options['rows'] or 1000000
+        readers = options['concurrency']
+        duration = options['duration']
+        table_sql, index_sql = model_ddl()
+        pragmas = get_sqlite_pragmas_for_bench()
+
+        reader_queries = [
+            sql_of(BatchLog.objects.filter(batch_id='batch_1').values_list('status', 'success_count')),
+            sql_of(BatchLog.objects.order_by('-started_at').values_list('batch_id', 'status')[:20]),
+            sql_of(Woo.objects.filter(is_sent=False).values('id'), count=True),
+        ]
+        ack_size = 500
+        poll_interval = 0.005  # reader 1개당 초당 최대 200회 폴링
+
+        self.stdout.write(f"  rows={rows:,}, readers={readers}, duration={duration}s\n")
+
+        for label, profile in [('before: default (rollback journal)', {}), ('after: SQLITE_PRAGMAS', pragmas)]:
+            path = temp_db_path('bench_db_', directory=options['db'])
+            try:
+                db = sqlite3.connect(path)
+                for sql in table_sql + index_sql:
+                    db.execute(sql)
+                populate_synthetic_db(db, rows, unsent=rows, batches=1000)
+                db.close()
+
+                stop = threading.Event()
+                stats = {'writes': 0, 'write_errors': 0, 'reads': 0, 'read_errors': 0, 'latencies': []}
+                lock = threading.Lock()
+
+                def connect():
+                    # Django 기본값과 같은 5초 timeout, 프로필이 있으면 PRAGMA 로 덮어씀
+                    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+                    apply_sqlite_pragmas(conn.cursor(), profile)
+                    return conn
+
+                def writer():
+                    conn = connect()
+                    start_id = 1
+                    while not stop.is_set():
+                        end_id = start_id + ack_size - 1
+                        try:
+                            conn.execute('BEGIN')
+                            conn.execute(
+                                "UPDATE woo SET is_sent = 1, sent_at = ?, send_state = 'sent' WHERE id BETWEEN ? AND ?",
+                                ('2025-10-24 00:00:00', start_id, end_id)
+                            )
+                            conn.execute(
+                                "UPDATE batch_log SET success_count = success_count + ? WHERE batch_id = 'batch_1'",
+                                (ack_size,)
+                            )
+                            conn.execute('COMMIT')
+                            stats['writes'] += 1
+                        except sqlite3.OperationalError:
+                            if conn.in_transaction:
+                                conn.execute('ROLLBACK')
+                            stats['write_errors'] += 1
+                        start_id = end_id + 1 if end_id < rows else 1
+                    conn.close()
+
+                def reader():
+                    conn = connect()
+                    local = []
+                    errors = 0
+                    index = 0
+                    while not stop.is_set():
+                        sql, params = reader_queries[index % len(reader_queries)]
+                        index += 1
+                        start = time.perf_counter()
+                        try:
+                            conn.execute(sql, params).fetchall()
+                            local.append(time.perf_counter() - start)
+                        except sqlite3.OperationalError:
+                            errors += 1
+                        stop.wait(poll_interval)
+                    conn.close()
+                    with lock:
+                        stats['latencies'].extend(local)
+                        stats['reads'] += len(local)
+                        stats['read_errors'] += errors
+
+                threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+                for thread in threads:
+                    thread.start()
+                time.sleep(duration)
+                stop.set()
+                for thread in threads:
+                    thread.join()
+
+                latencies = sorted(stats['latencies']) or [0]
+                p50 = latencies[len(latencies) // 2] * 1000
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+                self.stdout.write(self.style.SUCCESS(f"  [{label}]"))
+                self.stdout.write(
+                    f"  writer: {stats['writes'] / duration:>10,.0f} commits/s "
+                    f"({stats['writes'] * ack_size / duration:,.0f} rows/s), errors={stats['write_errors']}"
+                )
+                self.stdout.write(
+                    f"  readers: {stats['reads'] / duration:>9,.0f} queries/s, "
+                    f"p50={p50:.2f}ms p99={p99:.2f}ms max={latencies[-1] * 1000:.1f}ms, "
+                    f"errors={stats['read_errors']}\n"
+                )
+            finally:
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
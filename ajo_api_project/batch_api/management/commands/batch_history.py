@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db.models.functions import Substr
 from batch_api.models import BatchLog
 from datetime import datetime, timedelta
 
@@ -26,12 +27,12 @@ class Command(BaseCommand):
         
         if options['today']:
             from datetime import date
-            logs = BatchLog.objects.filter(started_at__date=date.today())
+            logs = BatchLog.objects.filter(started_at__date=date.today()).defer('error_message')
             self.stdout.write(f"\n오늘 ({date.today()}) 실행된 배치\n")
         else:
             days = options['days']
             since = datetime.now() - timedelta(days=days)
-            logs = BatchLog.objects.filter(started_at__gte=since)
+            logs = BatchLog.objects.filter(started_at__gte=since).defer('error_message')
             self.stdout.write(f"\n최근 {days}일 배치 이력\n")
         
         if logs.count() == 0:
@@ -45,6 +46,8 @@ class Command(BaseCommand):
             f"{'Records':<8} "
             f"{'Success':<8} "
             f"{'Failed':<8} "
+            f"{'Retries':<8} "
+            f"{'Skipped':<8} "
             f"{'Started At':<20}"
         )
         self.stdout.write('-' * 100)
@@ -67,14 +70,28 @@ class Command(BaseCommand):
                 f"{log.total_records:<8} "
                 f"{log.success_count:<8} "
                 f"{log.fail_count:<8} "
+                f"{log.retry_count:<8} "
+                f"{log.skipped_count:<8} "
                 f"{started:<20}"
             )
             
-            # 에러 메시지가 있으면 표시
-            if log.error_message:
-                self.stdout.write(
-                    self.style.ERROR(f"  └─ Error: {log.error_message[:80]}...")
-                )
+            # 실패가 있으면 첫 번째 실패 레코드 표시 (error_message 는 읽지 않음)
+            if log.fail_count:
+                failure = log.failures.order_by('id').first()
+                if failure is not None:
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f"  └─ Error: woo {failure.woo_id} "
+                            f"[{failure.status_code or failure.error_class}] {failure.error[:80]}"
+                        )
+                    )
+            elif log.status == 'FAILED':
+                # 배치 자체가 예외로 실패 (실패 레코드 없음) - error_message 앞부분만 조회
+                error = BatchLog.objects.filter(pk=log.pk).values_list(
+                    Substr('error_message', 1, 80), flat=True
+                ).first()
+                if error:
+                    self.stdout.write(self.style.ERROR(f"  └─ Error: {error}"))
         
         self.stdout.write('-' * 100)
         self.stdout.write(f"\n총 {logs.count()}개 배치 실행")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from batch_api.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = 'DB 큐(BatchLog status=QUEUED)에 등록된 배치 작업 실행'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5,
+            help='큐 폴링 간격 초 (기본: 5)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='대기 중인 작업만 처리하고 종료',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('배치 워커 시작'))
+        run_worker(poll_interval=options['poll_interval'], once=options['once'])
@@ -1,21 +1,97 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from batch_api import health
 from batch_api.models import Woo
 from datetime import datetime
+import re
 import time
-import requests
+
+
+# 일의 자리가 0 또는 5인 레코드에 쓰는 고정 계정
+FIXED_EMAIL = 'whi21@naver.com'
+FIXED_PHONE = '+821098714077'
+TEST_EMAIL_RE = re.compile(r'^test(\d+)@')
+
+
+def get_last_test_number():
+    """가장 최근 test 계정 번호 (id 역순으로 첫 test 계정만 조회)"""
+    email = (Woo.objects.filter(email__startswith='test')
+             .order_by('-id').values_list('email', flat=True).first())
+    match = TEST_EMAIL_RE.match(email or '')
+    return int(match.group(1)) if match else 0
+
+
+INSERT_FIELDS = (
+    'id', 'email', 'phone', 'name', '_id', 'createdby', 'modifiedby', 'is_sent', 'send_state', 'modified_at',
+)
+
+
+def build_rows(start_id, count, test_count, current_date, current_timestamp, modified_at):
+    """start_id 부터 count 개의 INSERT_FIELDS 순서 튜플 생성 (id 와 email/phone 순번을 미리 계산)"""
+    rows = []
+    for new_id in range(start_id, start_id + count):
+        ones_digit = new_id % 10
+
+        # 일의 자리가 0 또는 5인 경우 (마지막 데이터)
+        if ones_digit == 0 or ones_digit == 5:
+            email = FIXED_EMAIL
+            phone = FIXED_PHONE
+        else:
+            # test 계정 순차 증가
+            test_count += 1
+            email = f'test{test_count:05d}@gmail.com'
+            phone = f'+8211{test_count:08d}'  # E.164 형식
+
+        rows.append((
+            new_id, email, phone, f'woo{new_id}', f'woo{new_id}{current_date}',
+            current_timestamp, current_timestamp, False, Woo.SEND_STATE_PENDING, modified_at,
+        ))
+    return rows, test_count
+
+
+def get_sequence_reset_sql():
+    """id 를 직접 넣은 뒤 id 시퀀스를 MAX(id) 로 맞추는 SQL 목록 (PostgreSQL 등, SQLite 는 필요 없어 빈 목록)"""
+    return connection.ops.sequence_reset_sql(no_style(), [Woo])
+
+
+def get_insert_sql():
+    """Woo 다중 행 INSERT 문 - 컬럼명은 모델 메타에서 가져옴"""
+    quote = connection.ops.quote_name
+    columns = [Woo._meta.get_field(name).column for name in INSERT_FIELDS]
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(Woo._meta.db_table),
+        ', '.join(quote(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
 
 
 class Command(BaseCommand):
-    help = 'Daily batch job - Create 5 records and send to AEP'
+    help = 'Daily batch job - Create records in bulk and send to AEP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5,
+                            help='생성할 레코드 수 (기본 5)')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='한 트랜잭션에 넣을 레코드 수 (기본 10000)')
+        parser.add_argument('--no-wait', action='store_true',
+                            help='생성 후 1분 대기 없이 바로 전송')
+        parser.add_argument('--no-send', action='store_true',
+                            help='데이터 생성만 하고 AEP 전송은 하지 않음 (부하 테스트 데이터 적재용)')
 
     def handle(self, *args, **options):
+        count = max(0, options['count'])
+        batch_size = max(1, options['batch_size'])
+
         print("=" * 60)
         print("Daily Batch 시작")
         print("=" * 60)
         
         # 마지막 ID 확인
-        last_record = Woo.objects.order_by('-id').first()
-        last_id = last_record.id if last_record else 0
+        last_id = Woo.objects.aggregate(last_id=Max('id'))['last_id'] or 0
         start_id = last_id + 1
         
         print(f"마지막 ID: {last_id}")
@@ -29,75 +105,71 @@ class Command(BaseCommand):
         print(f"현재 시간: {current_timestamp}")
         print(f"현재 날짜: {current_date}")
         
-        # 기존 test 계정 개수 확인
-        test_count = Woo.objects.filter(email__startswith='test').count()
-        print(f"기존 test 계정: {test_count}개\n")
+        # 마지막 test 계정 번호 확인
+        test_count = get_last_test_number()
+        print(f"마지막 test 계정 번호: {test_count}\n")
         
-        # 5개 데이터 생성
-        for i in range(5):
-            new_id = start_id + i
-            ones_digit = new_id % 10
-            
-            # 일의 자리가 0 또는 5인 경우 (마지막 데이터)
-            if ones_digit == 0 or ones_digit == 5:
-                email = 'whi21@naver.com'
-                phone = '+821098714077'
-            else:
-                # test 계정 순차 증가
-                test_count += 1
-                email = f'test{test_count:05d}@gmail.com'
-                phone = f'+8211{test_count:08d}'  # E.164 형식
-            
-            woo = Woo.objects.create(
-                email=email,
-                phone=phone,
-                name=f'woo{new_id}',
-                _id=f'woo{new_id}{current_date}',
-                createdby=current_timestamp,
-                modifiedby=current_timestamp,
-                is_sent=False
+        # count 개 데이터를 batch_size 단위 executemany 로 생성
+        insert_sql = get_insert_sql()
+        # id 를 직접 넣으면 시퀀스가 전진하지 않으므로 트랜잭션마다 맞춰서 이후 ORM 생성과 id 가 겹치지 않게 함
+        sequence_reset_sql = get_sequence_reset_sql()
+        modified_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        started = time.perf_counter()
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            rows, test_count = build_rows(
+                start_id + created, size, test_count, current_date, current_timestamp, modified_at
             )
-            
-            print(f"✓ 생성: ID={woo.id}, name={woo.name}, _id={woo._id}")
-            print(f"   email: {email}, phone: {phone}")
-        
-        print(f"\n총 5개 데이터 생성 완료")
-        
-        # 1분 대기
-        wait_time = 60
-        print(f'\n1분 대기 중...')
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(insert_sql, rows)
+                for sql in sequence_reset_sql:
+                    cursor.execute(sql)
+            health.record_created(size)
+            created += size
+
+            if count <= 10:
+                for new_id, email, phone, name, _id, *_ in rows:
+                    print(f"✓ 생성: ID={new_id}, name={name}, _id={_id}")
+                    print(f"   email: {email}, phone: {phone}")
+            else:
+                print(f"\r  생성: {created}/{count}", end='', flush=True)
+
+        elapsed = time.perf_counter() - started
+        if count > 10:
+            print()
+        print(f"\n총 {created}개 데이터 생성 완료 ({elapsed:.2f}s)")
         
-        start_time = time.time()
-        while time.time() - start_time < wait_time:
-            remaining = wait_time - (time.time() - start_time)
-            mins, secs = divmod(int(remaining), 60)
-            print(f'\r  남은 시간: {mins:02d}:{secs:02d}', end='', flush=True)
-            time.sleep(1)
+        if options['no_send']:
+            print("=" * 60)
+            print("Daily Batch 완료 (전송 생략)")
+            print("=" * 60)
+            return
         
-        print(f'\n1분 대기 완료!')
+        if not options['no_wait']:
+            self.wait(60)
         
-        # AEP로 전송
-        print(f'\nAEP로 데이터 전송 중...')
+        # AEP로 전송 (현재 프로세스에서 바로 실행)
+        print('\nAEP로 데이터 전송 중...')
         
         try:
-            response = requests.post(
-                'http://127.0.0.1:8000/api/batch/run/',
-                timeout=300
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✓ 전송 성공!")
-                print(f"  Batch ID: {result.get('batch_id')}")
-                print(f"  Total: {result.get('total_records')}")
-                print(f"  Success: {result.get('success_count')}")
-                print(f"  Failed: {result.get('fail_count')}")
-            else:
-                print(f"✗ 전송 실패: HTTP {response.status_code}")
-                
+            call_command('run_batch', stdout=self.stdout, stderr=self.stderr)
         except Exception as e:
             print(f"✗ 전송 에러: {e}")
         
         print("=" * 60)
         print("Daily Batch 완료")
         print("=" * 60)
+
+    def wait(self, wait_time):
+        """전송 전 wait_time 초 대기하며 남은 시간 출력"""
+        print(f'\n{wait_time}초 대기 중...')
+        
+        start_time = time.time()
+        while time.time() - start_time < wait_time:
+            remaining = wait_time - (time.time() - start_time)
+            mins, secs = divmod(int(remaining), 60)
+            print(f'\r  남은 시간: {mins:02d}:{secs:02d}', end='', flush=True)
+            time.sleep(1)
+        
+        print('\n대기 완료!')
@@ -0,0 +1,29 @@
+from django.core.management.base import CommandError
+
+from batch_api.jobs import run_batch
+from batch_api.models import BatchLog
+
+from .run_batch import Command as RunBatchCommand
+
+
+class Command(RunBatchCommand):
+    help = '지정한 배치에서 실패한 레코드만 현재 프로세스에서 다시 전송 (결과는 하위 BatchLog 에 기록)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('batch_id', help='실패 레코드를 재전송할 원래 배치 ID')
+
+    def handle(self, *args, **options):
+        try:
+            parent = BatchLog.objects.defer('error_message').get(batch_id=options['batch_id'])
+        except BatchLog.DoesNotExist:
+            raise CommandError(f"배치를 찾을 수 없습니다: {options['batch_id']}")
+
+        if parent.status in ('QUEUED', 'RUNNING'):
+            raise CommandError(f"배치가 아직 {parent.status} 상태입니다: {parent.batch_id}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'실패 레코드 재전송 시작 ({parent.batch_id}, 실패 {parent.fail_count}건)'
+        ))
+
+        result = run_batch(progress=self.print_progress, parent=parent)
+        self.print_result(result)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from batch_api.jobs import run_batch
+
+
+class Command(BaseCommand):
+    help = '배치를 현재 프로세스에서 바로 실행 (runserver 불필요) - 청크마다 진행 통계 출력'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('배치 실행 시작'))
+
+        result = run_batch(progress=self.print_progress)
+
+        self.print_result(result)
+
+    def print_result(self, result):
+        """배치 결과 요약 출력 (예외로 중단된 배치는 CommandError)"""
+        if result.get('status') == 'failed':
+            raise CommandError(f"배치 실패: {result.get('batch_id')} - {result.get('error')}")
+
+        self.stdout.write(f"\n✓ 전송 완료! ({result.get('batch_status')})")
+        self.stdout.write(f"  Batch ID: {result.get('batch_id')}")
+        self.stdout.write(f"  Total: {result.get('total_records')}")
+        self.stdout.write(f"  Success: {result.get('success_count')}")
+        self.stdout.write(f"  Failed: {result.get('fail_count')}")
+        self.stdout.write(f"  Retries: {result.get('retry_count', 0)}")
+        self.stdout.write(f"  Skipped (unchanged): {result.get('skipped_count', 0)}")
+
+    def print_progress(self, stats):
+        """청크 완료마다 누적 진행률, 처리 속도, 남은 시간 출력"""
+        total = stats['total_records'] or 1
+        processed = stats['processed']
+        elapsed = stats['elapsed']
+        rate = processed / elapsed if elapsed > 0 else 0
+        eta = (stats['total_records'] - processed) / rate if rate > 0 else 0
+
+        self.stdout.write(
+            f"  [chunk {stats['chunk']}] {processed}/{stats['total_records']} "
+            f"({processed * 100 / total:.1f}%) "
+            f"성공 {stats['success_count']} 실패 {stats['fail_count']} 재시도 {stats['retry_count']} "
+            f"생략 {stats['skipped_count']} "
+            f"| {rate:.0f} rec/s | 남은 시간 {eta:.0f}s"
+        )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from batch_api.sharding import get_process_count, run_sharded_batch
+
+
+class Command(BaseCommand):
+    help = '미전송 id 범위를 샤드로 나눠 여러 프로세스에서 배치 실행 - 샤드마다 진행 통계 출력'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help='워커 프로세스 수 (기본: BATCH_SHARD_PROCESSES 또는 CPU 코어 수)',
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=None,
+            help='샤드 수 (기본: 프로세스 수 x 4)',
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes'] or get_process_count()
+        self.stdout.write(self.style.SUCCESS(f'샤드 배치 실행 시작 (프로세스 {processes}개)'))
+
+        result = run_sharded_batch(
+            processes=processes, shards=options['shards'], progress=self.print_progress
+        )
+
+        self.stdout.write(f"\n✓ 전송 완료! ({result.get('batch_status')})")
+        self.stdout.write(f"  Batch ID: {result.get('batch_id')}")
+        self.stdout.write(f"  Total: {result.get('total_records')}")
+        self.stdout.write(f"  Success: {result.get('success_count')}")
+        self.stdout.write(f"  Failed: {result.get('fail_count')}")
+        self.stdout.write(f"  Retries: {result.get('retry_count', 0)}")
+        self.stdout.write(f"  Skipped (unchanged): {result.get('skipped_count', 0)}")
+
+    def print_progress(self, stats):
+        """샤드 완료마다 누적 진행률과 처리 속도 출력"""
+        total = stats['total_records'] or 1
+        processed = stats['processed']
+        elapsed = stats['elapsed']
+        rate = processed / elapsed if elapsed > 0 else 0
+
+        self.stdout.write(
+            f"  [shard {stats['shard']}/{stats['shards']}] {processed}/{stats['total_records']} "
+            f"({processed * 100 / total:.1f}%) "
+            f"성공 {stats['success_count']} 실패 {stats['fail_count']} 재시도 {stats['retry_count']} "
+            f"생략 {stats['skipped_count']} "
+            f"| {rate:.0f} rec/s"
+        )
@@ -0,0 +1,24 @@
+from batch_api.sync import get_destination, run_sync
+
+from .run_batch import Command as RunBatchCommand
+
+
+class Command(RunBatchCommand):
+    help = '마지막 동기화 이후 추가/변경된 레코드만 전송 (대상별 워터마크 기준)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--destination',
+            default=None,
+            help='동기화 대상 이름 (기본: SYNC_DESTINATION)',
+        )
+
+    def handle(self, *args, **options):
+        destination = options['destination'] or get_destination()
+        self.stdout.write(self.style.SUCCESS(f'증분 동기화 시작 ({destination})'))
+
+        result = run_sync(destination=destination, progress=self.print_progress)
+        self.print_result(result)
+
+        watermark = result['watermark']
+        self.stdout.write(f"  Watermark: {watermark['modified_at']} / {watermark['last_id']}")
@@ -0,0 +1,226 @@
+import bisect
+import math
+import threading
+import time
+
+from .throttle import get_throttle
+
+# Prometheus text exposition 형식 Content-Type
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# AEP 요청/스로틀 대기 버킷 (초) - prometheus_client 기본값과 같음
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# 레코드 1건 페이로드 변환 버킷 (초)
+TRANSFORM_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005)
+# DB 조회/쓰기 1회 버킷 (초)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_registry = []
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    return repr(float(value))
+
+
+def _escape(value, quote=True):
+    value = value.replace('\\', '\\\\').replace('\n', '\\n')
+    return value.replace('"', '\\"') if quote else value
+
+
+class Metric:
+    """프로세스 전역 메트릭 - 레이블 값 튜플별로 값을 보관하고 생성 시 레지스트리에 등록
+
+    function 이 주어지면 값을 보관하지 않고 렌더링할 때마다 호출한다 (None 이면 생략).
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self.lock = threading.Lock()
+        self.values = {}
+        if not self.labelnames and function is None:
+            self.values[()] = 0
+        _registry.append(self)
+
+    def _labels(self, labelvalues, extra=()):
+        pairs = [*zip(self.labelnames, labelvalues), *extra]
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+    def samples(self):
+        """(이름 접미사, 레이블 문자열, 값) 목록"""
+        if self.function is not None:
+            value = self.function()
+            return [] if value is None else [('', '', value)]
+        with self.lock:
+            return [('', self._labels(labels), value) for labels, value in sorted(self.values.items())]
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {_escape(self.documentation, quote=False)}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(
+            f'{self.name}{suffix}{labels} {_format_value(value)}' for suffix, labels, value in self.samples()
+        )
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, labels=()):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, labels=()):
+        with self.lock:
+            self.values[labels] = value
+
+    def inc(self, amount=1, labels=()):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, amount=1, labels=()):
+        self.inc(-amount, labels)
+
+
+class Histogram(Metric):
+    """버킷별 관측 건수와 합계 - 렌더링할 때 누적 건수 (le) 로 변환"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        if not self.labelnames:
+            self.values[()] = self._empty()
+
+    def count(self, labels=()):
+        """labels 의 관측 건수"""
+        with self.lock:
+            state = self.values.get(labels)
+            return sum(state[0]) if state is not None else 0
+
+    def _empty(self):
+        # 버킷별 건수 (마지막은 +Inf), 합계
+        return [[0] * (len(self.buckets) + 1), 0.0]
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = self._empty()
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self.lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in sorted(self.values.items())]
+        samples = []
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                samples.append(('_bucket', self._labels(labels, [('le', _format_value(bound))]), cumulative))
+            samples.append(('_sum', self._labels(labels), total))
+            samples.append(('_count', self._labels(labels), cumulative))
+        return samples
+
+
+def render():
+    """등록된 모든 메트릭을 Prometheus text 형식 문자열로 반환"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def _concurrency_limit():
+    limiter = get_throttle().limiter
+    return int(limiter.limit) if limiter is not None else None
+
+
+RECORDS_FETCHED = Counter('batch_records_fetched_total', '전송 대상으로 선점해서 읽은 레코드 수')
+FETCH_SECONDS = Histogram('batch_fetch_seconds', '청크 1회 선점/조회 시간', buckets=DB_BUCKETS)
+TRANSFORM_SECONDS = Histogram('batch_transform_seconds', '레코드 1건 페이로드 변환 시간', buckets=TRANSFORM_BUCKETS)
+# 변환은 레코드마다 호출되므로 건수는 히스토그램에서 읽는다 (관측당 잠금 1회)
+RECORDS_TRANSFORMED = Counter(
+    'batch_records_transformed_total', 'AEP 페이로드로 변환한 레코드 수', function=TRANSFORM_SECONDS.count
+)
+RECORDS_SENT = Counter('batch_records_sent_total', 'AEP 전송에 성공한 레코드 수')
+RECORDS_FAILED = Counter('batch_records_failed_total', '재시도 후에도 전송에 실패한 레코드 수')
+RECORDS_RETRIED = Counter('batch_records_retried_total', '레코드 전송 재시도 횟수')
+RECORDS_SKIPPED = Counter('batch_records_skipped_total', '페이로드가 마지막 전송과 같아 생략한 레코드 수')
+DB_UPDATE_SECONDS = Histogram(
+    'batch_db_update_seconds', '전송 결과 DB 반영 1회 시간 (ack: 성공, failure: 실패 기록, release: 선점 해제, renew: 선점 연장)',
+    ['op'], buckets=DB_BUCKETS
+)
+AEP_REQUEST_SECONDS = Histogram(
+    'aep_request_duration_seconds', 'AEP 요청 응답 시간 (스로틀 대기 제외, 예외는 status_code="error")',
+    ['status_code']
+)
+AEP_THROTTLE_WAIT_SECONDS = Histogram('aep_throttle_wait_seconds', 'AEP 요청 전 속도 제한/동시성 슬롯 대기 시간')
+AEP_REQUESTS_IN_FLIGHT = Gauge('aep_requests_in_flight', '응답을 기다리는 AEP 요청 수')
+AEP_CONCURRENCY_LIMIT = Gauge(
+    'aep_concurrency_limit', '적응형 동시성 제한의 현재 동시 요청 상한', function=_concurrency_limit
+)
+DISPATCH_IN_FLIGHT = Gauge('batch_dispatch_in_flight', '전송 중인 작업 수 (스로틀/재시도 대기 포함)')
+QUEUE_DEPTH = Gauge('batch_queue_depth', '대기 중(QUEUED) 배치 작업 수')
+UNSENT_RECORDS = Gauge('batch_records_unsent', '미전송 레코드 수 (헬스 체크 캐시 스냅샷)')
+
+
+def record_fetch(started, count):
+    """청크 선점/조회 1회 기록 (started: time.perf_counter())"""
+    FETCH_SECONDS.observe(time.perf_counter() - started)
+    RECORDS_FETCHED.inc(count)
+
+
+def record_transform(started):
+    """레코드 1건 페이로드 변환 기록"""
+    TRANSFORM_SECONDS.observe(time.perf_counter() - started)
+
+
+def record_results(success, fail, retries, skipped):
+    """청크 전송 결과 건수 기록"""
+    RECORDS_SENT.inc(success)
+    RECORDS_FAILED.inc(fail)
+    RECORDS_RETRIED.inc(retries)
+    RECORDS_SKIPPED.inc(skipped)
+
+
+def record_db_update(op, started):
+    """DB 반영 1회 기록"""
+    DB_UPDATE_SECONDS.observe(time.perf_counter() - started, (op,))
+
+
+def start_aep_request(wait_started):
+    """스로틀 통과 직후 호출 - 대기 시간을 기록하고 요청 시작 시각 반환"""
+    started = time.perf_counter()
+    AEP_THROTTLE_WAIT_SECONDS.observe(started - wait_started)
+    AEP_REQUESTS_IN_FLIGHT.inc()
+    return started
+
+
+def finish_aep_request(started, status_code=None):
+    """AEP 요청 1건 완료 기록 - status_code 가 없으면 연결/타임아웃 예외"""
+    AEP_REQUESTS_IN_FLIGHT.dec()
+    AEP_REQUEST_SECONDS.observe(
+        time.perf_counter() - started, (str(status_code) if status_code is not None else 'error',)
+    )
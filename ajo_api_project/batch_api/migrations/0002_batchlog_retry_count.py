@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchlog',
+            name='retry_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0002_batchlog_retry_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batchlog',
+            index=models.Index(fields=['-started_at'], name='batch_log_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='woo',
+            index=models.Index(condition=models.Q(('is_sent', False)), fields=['id'], name='woo_unsent_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0003_unsent_and_started_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='woo',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='woo',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
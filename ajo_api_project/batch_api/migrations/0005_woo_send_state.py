@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+def mark_sent_rows(apps, schema_editor):
+    """이미 전송된 레코드는 send_state='sent' 로 맞춤"""
+    Woo = apps.get_model('batch_api', 'Woo')
+    Woo.objects.filter(is_sent=True).update(send_state='sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0004_woo_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='woo',
+            name='send_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('in_flight', 'In flight'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=16),
+        ),
+        migrations.RunPython(mark_sent_rows, migrations.RunPython.noop),
+    ]
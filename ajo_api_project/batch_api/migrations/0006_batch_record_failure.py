@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0005_woo_send_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchRecordFailure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('woo_id', models.IntegerField()),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('error_class', models.CharField(blank=True, max_length=100, null=True)),
+                ('attempts', models.IntegerField(default=1)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('batch', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='failures', to='batch_api.batchlog')),
+            ],
+            options={
+                'db_table': 'batch_record_failure',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['batch', 'id'], name='batch_failure_batch_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0006_batch_record_failure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchlog',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='retries', to='batch_api.batchlog'),
+        ),
+    ]
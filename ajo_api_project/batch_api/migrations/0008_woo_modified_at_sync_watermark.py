@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:02
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill_sync_state(apps, schema_editor):
+    """첫 sync_batch 가 이미 전송된 레코드를 다시 보내지 않도록 modified_at 과 워터마크를 맞춤
+
+    기존 레코드는 모두 컬럼 추가 시각을 modified_at 으로 받으므로, 전송된 레코드는 sent_at
+    (없으면 추가 시각 직전) 으로 되돌리고 그 중 마지막 (modified_at, id) 에 워터마크를 둔다.
+    """
+    Woo = apps.get_model('batch_api', 'Woo')
+    SyncWatermark = apps.get_model('batch_api', 'SyncWatermark')
+    added_at = Woo.objects.aggregate(Max('modified_at'))['modified_at__max']
+    if added_at is None:
+        return
+    sent = Woo.objects.filter(is_sent=True)
+    sent.filter(sent_at__isnull=False).update(modified_at=F('sent_at'))
+    sent.filter(sent_at__isnull=True).update(modified_at=added_at - timedelta(microseconds=1))
+    last = sent.order_by('-modified_at', '-id').values_list('modified_at', 'id').first()
+    if last:
+        SyncWatermark.objects.create(
+            destination=getattr(settings, 'SYNC_DESTINATION', 'aep'),
+            modified_at=last[0],
+            last_id=last[1]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0007_batchlog_parent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destination', models.CharField(max_length=100, unique=True)),
+                ('modified_at', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'sync_watermark',
+            },
+        ),
+        migrations.AddField(
+            model_name='woo',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='woo',
+            index=models.Index(fields=['modified_at', 'id'], name='woo_modified_idx'),
+        ),
+        migrations.RunPython(backfill_sync_state, migrations.RunPython.noop),
+    ]
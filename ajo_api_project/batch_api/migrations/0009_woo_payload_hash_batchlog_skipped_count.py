@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0008_woo_modified_at_sync_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchlog',
+            name='skipped_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='woo',
+            name='payload_hash',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0009_woo_payload_hash_batchlog_skipped_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchlog',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+def mark_queued_jobs(apps, schema_editor):
+    """아직 대기 중인 큐 작업은 from_queue=True 로 맞춤"""
+    BatchLog = apps.get_model('batch_api', 'BatchLog')
+    BatchLog.objects.filter(status='QUEUED').update(from_queue=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('batch_api', '0010_batchlog_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchlog',
+            name='from_queue',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_queued_jobs, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 
 class BatchLog(models.Model):
     """배치 실행 로그"""
@@ -6,19 +7,54 @@ class BatchLog(models.Model):
     total_records = models.IntegerField(default=0)
     success_count = models.IntegerField(default=0)
     fail_count = models.IntegerField(default=0)
+    retry_count = models.IntegerField(default=0)  # 일시적 실패로 재전송한 횟수
+    skipped_count = models.IntegerField(default=0)  # 마지막 전송과 페이로드가 같아 전송을 생략한 건수
     status = models.CharField(max_length=20)
     error_message = models.TextField(null=True, blank=True)
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # RUNNING 작업을 실행 중인 프로세스가 주기적으로 갱신 - 끊기면 다른 워커가 이어서 실행 (큐 작업만)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    # DB 큐 (enqueue_batch) 로 등록된 작업 - run_batch/샤드/동기화 커맨드가 직접 만든 로그는 이어서 실행하지 않음
+    from_queue = models.BooleanField(default=False)
+    # 실패 레코드 재전송 배치이면 원래 배치
+    parent = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='retries'
+    )
     
     class Meta:
         db_table = 'batch_log'
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['-started_at'], name='batch_log_started_idx'),
+        ]
     
     def __str__(self):
         return f"{self.batch_id} - {self.status}"
 
 
+class BatchRecordFailure(models.Model):
+    """배치에서 전송 실패한 레코드 (레코드당 1행)"""
+    # (batch, id) 복합 인덱스가 batch 단독 조회도 처리하므로 FK 인덱스는 생략
+    batch = models.ForeignKey(BatchLog, on_delete=models.CASCADE, related_name='failures', db_index=False)
+    woo_id = models.IntegerField()
+    status_code = models.IntegerField(null=True, blank=True)  # HTTP 응답 코드 (네트워크 예외면 None)
+    error_class = models.CharField(max_length=100, null=True, blank=True)
+    attempts = models.IntegerField(default=1)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'batch_record_failure'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['batch', 'id'], name='batch_failure_batch_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.batch_id} - woo {self.woo_id}"
+
+
 class Woo(models.Model):
     """테스트 데이터"""
     email = models.EmailField(max_length=255)
@@ -27,13 +63,54 @@ class Woo(models.Model):
     _id = models.CharField(max_length=100, db_column='_id')
     createdby = models.CharField(max_length=100)
     modifiedby = models.CharField(max_length=100)
+    # 증분 동기화 기준 시각 - save() 때마다 갱신 (queryset.update() 로 바꿀 때는 직접 넣어야 함)
+    modified_at = models.DateTimeField(auto_now=True)
     
     # 전송 여부 플래그 추가
     is_sent = models.BooleanField(default=False)
     sent_at = models.DateTimeField(null=True, blank=True)
+    # 마지막으로 전송 성공한 페이로드의 해시 - 같은 페이로드는 다시 보내지 않음
+    payload_hash = models.CharField(max_length=32, null=True, blank=True)
+    
+    # 전송 상태: pending -> in_flight (선점) -> sent / failed
+    SEND_STATE_PENDING = 'pending'
+    SEND_STATE_IN_FLIGHT = 'in_flight'
+    SEND_STATE_SENT = 'sent'
+    SEND_STATE_FAILED = 'failed'
+    SEND_STATE_CHOICES = [
+        (SEND_STATE_PENDING, 'Pending'),
+        (SEND_STATE_IN_FLIGHT, 'In flight'),
+        (SEND_STATE_SENT, 'Sent'),
+        (SEND_STATE_FAILED, 'Failed'),
+    ]
+    send_state = models.CharField(max_length=16, choices=SEND_STATE_CHOICES, default=SEND_STATE_PENDING)
+    
+    # 전송 작업 선점 정보 (동시에 실행되는 배치가 같은 레코드를 중복 전송하지 않도록)
+    claimed_by = models.CharField(max_length=64, null=True, blank=True)
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         db_table = 'woo'
+        indexes = [
+            # 미전송 레코드만 담는 부분 인덱스 (지원하지 않는 DB에서는 생성되지 않음)
+            models.Index(fields=['id'], name='woo_unsent_idx', condition=Q(is_sent=False)),
+            # 증분 동기화 (modified_at, id) 범위 조회
+            models.Index(fields=['modified_at', 'id'], name='woo_modified_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.email})"
+
+
+class SyncWatermark(models.Model):
+    """전송 대상별 증분 동기화 위치 - (modified_at, last_id) 까지 전송 완료"""
+    destination = models.CharField(max_length=100, unique=True)
+    modified_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'sync_watermark'
+    
+    def __str__(self):
+        return f"{self.destination} - {self.modified_at} / {self.last_id}"
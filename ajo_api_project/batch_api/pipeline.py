@@ -0,0 +1,258 @@
+import time
+
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from . import json_backend, metrics
+from .ack import AckWriter
+from .claims import ClaimLease, iter_claimed_chunks, iter_claimed_failures, new_claim_token, release_claims
+from .failures import FailureWriter
+from .dispatcher import dispatch_records
+from .log import logger
+from .retry import build_retry_policy
+from .models import BatchLog, BatchRecordFailure, Woo
+
+
+def get_chunk_size():
+    """청크당 조회/전송 레코드 수 (settings.BATCH_CHUNK_SIZE)"""
+    return max(1, int(getattr(settings, 'BATCH_CHUNK_SIZE', 1000)))
+
+
+def get_error_limit():
+    """배치당 보관하는 실패 샘플 수 (settings.BATCH_ERROR_SAMPLE_SIZE)"""
+    return int(getattr(settings, 'BATCH_ERROR_SAMPLE_SIZE', 100))
+
+
+def send_chunk(chunk, ack, retry_policy=None, errors=None, error_limit=0, failures=None, lease=None):
+    """청크를 AEP로 동시 전송하고 (success, fail, retries, skipped) 반환
+
+    성공한 레코드 id 는 페이로드 해시와 함께 ack 에 추가하고, 실패는 모두 failures(FailureWriter) 에 쓰고
+    errors 에는 요약용으로 error_limit 건까지만 기록한다.
+    마지막 전송과 페이로드가 같아 생략한 레코드는 skipped 로 세고 전송 완료로 반영한다.
+    lease (ClaimLease) 가 주어지면 결과를 받을 때마다 청크의 선점 만료 시각을 연장한다.
+    """
+    success_count = fail_count = retry_count = skipped_count = 0
+    # AEP_MAX_WORKERS 개까지 in-flight, Batch 모드 지원
+    for record, result in dispatch_records(chunk, retry_policy=retry_policy, lease=lease):
+        if lease is not None:
+            lease.renew(chunk[0][0], chunk[-1][0])
+        retry_count += result.get('attempts', 1) - 1
+        if result.get('skipped'):
+            skipped_count += 1
+            # 저장된 payload_hash 와 같으므로 해시 없이 추가 - id 범위/IN UPDATE 로 반영
+            ack.add(record[0])
+        elif result.get('success'):
+            success_count += 1
+            ack.add(record[0], result.get('payload_hash'))
+        else:
+            fail_count += 1
+            if failures is not None:
+                failures.add(record[0], result)
+            if errors is not None and len(errors) < error_limit:
+                errors.append({
+                    'record_id': record[0],
+                    'error': result.get('error', 'Unknown error')
+                })
+    metrics.record_results(success_count, fail_count, retry_count, skipped_count)
+    return success_count, fail_count, retry_count, skipped_count
+
+
+class ChunkSender:
+    """선점한 청크를 하나씩 전송하고 배치 건수를 누적 (execute_batch / run_shard / run_sync 공통)
+
+    send() 는 청크를 전송한 뒤 성공 플래그/실패 기록을 커밋하고 release() 로 남은 선점을 되돌린 다음,
+    청크 건수를 BatchLog 에 F() 로 더하고 progress 를 누적 통계 dict 로 호출한다.
+    여러 샤드 프로세스가 같은 BatchLog 에 더해도 서로 덮어쓰지 않는다.
+    """
+
+    def __init__(self, batch_log_pk, batch_id, total_records, ack, failures, lease=None, progress=None,
+                 started=None):
+        self.batch_log_pk = batch_log_pk
+        self.batch_id = batch_id
+        self.total_records = total_records
+        self.ack = ack
+        self.failures = failures
+        self.lease = lease
+        self.progress = progress
+        self.started = started if started is not None else time.perf_counter()
+        self.retry_policy = build_retry_policy(total_records)
+        self.errors = []  # error_message 요약용 - 최대 BATCH_ERROR_SAMPLE_SIZE 건 (전체 실패는 BatchRecordFailure)
+        self.error_limit = get_error_limit()
+        self.chunks = 0
+        self.success_count = self.fail_count = self.retry_count = self.skipped_count = 0
+
+    def send(self, chunk, release):
+        """청크 1개 전송 후 (success, fail, retries, skipped) 반환 - 중단되어도 반영/release 는 수행"""
+        chunk_started = time.perf_counter()
+        try:
+            counts = send_chunk(
+                chunk, self.ack, self.retry_policy, self.errors, self.error_limit, self.failures, self.lease
+            )
+        finally:
+            self.ack.flush()
+            self.failures.flush()
+            release()
+
+        chunk_success, chunk_fail, chunk_retries, chunk_skipped = counts
+        self.chunks += 1
+        self.success_count += chunk_success
+        self.fail_count += chunk_fail
+        self.retry_count += chunk_retries
+        self.skipped_count += chunk_skipped
+        BatchLog.objects.filter(pk=self.batch_log_pk).update(
+            success_count=F('success_count') + chunk_success,
+            fail_count=F('fail_count') + chunk_fail,
+            retry_count=F('retry_count') + chunk_retries,
+            skipped_count=F('skipped_count') + chunk_skipped,
+        )
+
+        logger.info(
+            "event=chunk_done batch=%s chunk=%d records=%d success=%d fail=%d skipped=%d elapsed=%.3fs",
+            self.batch_id, self.chunks, len(chunk), chunk_success, chunk_fail, chunk_skipped,
+            time.perf_counter() - chunk_started
+        )
+
+        if self.progress is not None:
+            self.progress({
+                'batch_id': self.batch_id,
+                'chunk': self.chunks,
+                'total_records': self.total_records,
+                'processed': self.success_count + self.fail_count + self.skipped_count,
+                'success_count': self.success_count,
+                'fail_count': self.fail_count,
+                'retry_count': self.retry_count,
+                'skipped_count': self.skipped_count,
+                'elapsed': time.perf_counter() - self.started,
+            })
+        return counts
+
+    def complete(self, batch_log):
+        """누적 건수로 batch_log 최종 상태 저장 (complete_batch_log)"""
+        complete_batch_log(
+            batch_log, self.success_count, self.fail_count, self.retry_count, self.errors, self.skipped_count
+        )
+
+
+def complete_batch_log(batch_log, success_count, fail_count, retry_count, errors, skipped_count=0):
+    """최종 건수와 상태(SUCCESS/PARTIAL/FAILED)를 batch_log 에 저장"""
+    batch_log.success_count = success_count
+    batch_log.fail_count = fail_count
+    batch_log.retry_count = retry_count
+    batch_log.skipped_count = skipped_count
+    batch_log.completed_at = timezone.now()
+
+    if fail_count == 0 and not errors:
+        batch_log.status = 'SUCCESS'
+    elif success_count == 0 and skipped_count == 0:
+        batch_log.status = 'FAILED'
+        batch_log.error_message = json_backend.dumps_str(errors)
+    else:
+        batch_log.status = 'PARTIAL'
+        batch_log.error_message = json_backend.dumps_str(errors)
+
+    batch_log.save()
+
+
+def execute_batch(batch_log, progress=None):
+    """배치 실행 - 전송되지 않은 데이터를 청크 단위로 전송하고 결과 dict 반환
+
+    batch_log.parent 가 있으면 그 배치에서 실패한 레코드만 다시 전송한다.
+
+    진행 상황(success_count/fail_count)은 청크마다 batch_log 에 저장되고,
+    progress 가 주어지면 청크마다 누적 통계 dict 로 호출된다.
+
+    레코드는 실행마다 새로 만든 토큰으로 선점하므로, heartbeat 가 끊겨 다른 워커가 같은 작업을 이어서
+    실행하더라도 이전 실행이 아직 선점 중인 레코드를 반영/해제하지 않는다.
+    """
+    batch_id = batch_log.batch_id
+    batch_started = time.perf_counter()
+
+    try:
+        # 1. 전송 대상 범위 확정 (실행 중 추가되는 레코드는 다음 배치에서 처리)
+        #    재전송 배치는 원래 배치에서 실패했고 아직 미전송인 레코드만 대상
+        targets = Woo.objects.filter(is_sent=False)
+        if batch_log.parent_id is not None:
+            targets = targets.filter(
+                id__in=BatchRecordFailure.objects.filter(batch_id=batch_log.parent_id).values('woo_id')
+            )
+        snapshot = targets.aggregate(total=Count('id'), max_id=Max('id'))
+        batch_log.total_records = snapshot['total']
+        # 이어서 실행하는 경우 이전 실행의 중간 건수는 버리고 처음부터 다시 센다
+        batch_log.success_count = batch_log.fail_count = batch_log.retry_count = batch_log.skipped_count = 0
+        batch_log.save()
+
+        if snapshot['total'] == 0:
+            batch_log.status = 'SUCCESS'
+            batch_log.completed_at = timezone.now()
+            batch_log.save()
+
+            return {
+                'status': 'completed',
+                'batch_id': batch_id,
+                'total_records': 0,
+                'success_count': 0,
+                'fail_count': 0,
+                'batch_status': 'SUCCESS',
+                'message': 'No unsent records to process'
+            }
+
+        # 청크는 실행 토큰으로 선점(in_flight)해서 가져오므로 동시에 실행되는 배치와 겹치지 않는다
+        # 성공한 레코드는 전송 완료 즉시 AckWriter 가 작은 트랜잭션 단위로 is_sent 반영
+        token = new_claim_token(batch_id)
+        lease = ClaimLease(token)
+        try:
+            with AckWriter(token=token) as ack, FailureWriter(batch_log.pk) as failures:
+                sender = ChunkSender(
+                    batch_log.pk, batch_id, snapshot['total'], ack, failures, lease, progress, batch_started
+                )
+                if batch_log.parent_id is not None:
+                    chunks = iter_claimed_failures(token, batch_log.parent_id, get_chunk_size(), lease)
+                else:
+                    chunks = iter_claimed_chunks(
+                        token, get_chunk_size(), max_id=snapshot['max_id'], lease=lease
+                    )
+
+                for chunk in chunks:
+                    # 청크 내 레코드를 AEP로 동시 전송 - 청크가 끝나면 실패한 레코드는 failed 로 선점 해제
+                    sender.send(chunk, lambda: release_claims(
+                        token, chunk[0][0], chunk[-1][0], state=Woo.SEND_STATE_FAILED
+                    ))
+        finally:
+            # 중단된 경우 아직 선점 중인 레코드를 다음 배치 대상으로 되돌림
+            release_claims(token, 0, snapshot['max_id'])
+
+        # 2. 배치 로그 업데이트
+        sender.complete(batch_log)
+
+        logger.info(
+            "event=batch_done batch=%s status=%s total=%d success=%d fail=%d retries=%d skipped=%d "
+            "elapsed=%.3fs",
+            batch_id, batch_log.status, batch_log.total_records, sender.success_count, sender.fail_count,
+            sender.retry_count, sender.skipped_count, time.perf_counter() - batch_started
+        )
+
+        return {
+            'status': 'completed',
+            'batch_id': batch_id,
+            'total_records': batch_log.total_records,
+            'success_count': sender.success_count,
+            'fail_count': sender.fail_count,
+            'retry_count': sender.retry_count,
+            'skipped_count': sender.skipped_count,
+            'batch_status': batch_log.status,
+            'errors': sender.errors if sender.errors else None
+        }
+
+    except Exception as e:
+        logger.exception("event=batch_failed batch=%s", batch_id)
+        batch_log.status = 'FAILED'
+        batch_log.error_message = str(e)
+        batch_log.completed_at = timezone.now()
+        batch_log.save()
+
+        return {
+            'status': 'failed',
+            'batch_id': batch_id,
+            'error': str(e)
+        }
@@ -0,0 +1,150 @@
+import asyncio
+import random
+import threading
+import time
+
+from django.conf import settings
+
+# 재시도 대상 예외 (send_to_aep 결과의 error_class) - requests, aiohttp (async 전송)
+RETRYABLE_EXCEPTIONS = (
+    'ConnectionError', 'ConnectTimeout', 'ReadTimeout', 'Timeout', 'ChunkedEncodingError',
+    'ClientConnectorError', 'ClientOSError', 'ServerDisconnectedError', 'ServerTimeoutError',
+    'ConnectionTimeoutError', 'SocketTimeoutError', 'TimeoutError', 'ClientPayloadError',
+)
+
+
+class RetryBudget:
+    """배치 1회에서 허용하는 전체 재시도 횟수 (스레드 안전)"""
+
+    def __init__(self, limit):
+        self.limit = max(0, int(limit))
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def try_spend(self, count=1):
+        """count 회 재시도 예산 차감, 예산이 부족하면 False"""
+        with self.lock:
+            if self.used + count > self.limit:
+                return False
+            self.used += count
+            return True
+
+
+class RetryPolicy:
+    """일시적 실패에 대한 지수 백오프 + full jitter 재시도 정책"""
+
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=10.0, status_codes=None, budget=None):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.status_codes = frozenset(status_codes or (408, 429, 500, 502, 503, 504))
+        self.budget = budget
+
+    def is_retryable(self, result):
+        """재시도할 만한 실패 결과인지 (재시도 대상 응답 코드 또는 네트워크 예외)
+
+        Retry-After 가 AEP_MAX_RETRY_AFTER 를 넘은 결과 (retryable=False) 는 재시도하지 않는다.
+        """
+        if result.get('success') or result.get('retryable') is False:
+            return False
+        status_code = result.get('status_code')
+        if status_code is not None:
+            return status_code in self.status_codes
+        return result.get('error_class') in RETRYABLE_EXCEPTIONS
+
+    def delay(self, retry, retry_after=None):
+        """retry 번째 재시도 전 대기 초 - min(max_delay, base * 2^(retry-1)) 범위의 full jitter
+
+        retry_after (응답의 Retry-After, 결과를 만들 때 AEP_MAX_RETRY_AFTER 이하로 제한됨) 보다는 짧지 않다.
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+        return max(backoff, retry_after or 0)
+
+    def allow(self, retry, count=1):
+        """retry 번째 재시도를 count 건에 대해 진행할 수 있는지 (예산 차감 포함)"""
+        if retry > self.max_retries:
+            return False
+        return self.budget is None or self.budget.try_spend(count)
+
+
+def build_retry_policy(total_records=0):
+    """settings 값으로 배치 1회용 RetryPolicy 생성 (예산은 대상 레코드 수에 비례)"""
+    budget = RetryBudget(
+        int(getattr(settings, 'AEP_RETRY_BUDGET_MIN', 100))
+        + int(total_records * float(getattr(settings, 'AEP_RETRY_BUDGET_RATIO', 0.1)))
+    )
+    return RetryPolicy(
+        max_retries=getattr(settings, 'AEP_RETRY_MAX_RETRIES', 3),
+        base_delay=getattr(settings, 'AEP_RETRY_BASE_DELAY', 0.5),
+        max_delay=getattr(settings, 'AEP_RETRY_MAX_DELAY', 10.0),
+        status_codes=getattr(settings, 'AEP_RETRY_STATUS_CODES', None),
+        budget=budget,
+    )
+
+
+def call_with_retry(send, policy):
+    """send() 를 정책에 따라 재시도하고 마지막 결과 반환 (result['attempts'] 에 시도 횟수)"""
+    retry = 0
+    while True:
+        result = send()
+        if policy is None or not policy.is_retryable(result) or not policy.allow(retry + 1):
+            result['attempts'] = retry + 1
+            return result
+        retry += 1
+        time.sleep(policy.delay(retry, result.get('retry_after')))
+
+
+def call_batch_with_retry(send_batch, messages, policy):
+    """Batch 전송 후 재시도 대상 메시지만 모아서 다시 전송, 메시지별 결과 리스트 반환"""
+    results = [None] * len(messages)
+    pending = list(range(len(messages)))
+    retry = 0
+    while True:
+        sent = send_batch([messages[i] for i in pending])
+        retry_indexes = []
+        for index, result in zip(pending, sent):
+            result['attempts'] = retry + 1
+            results[index] = result
+            if policy is not None and policy.is_retryable(result):
+                retry_indexes.append(index)
+
+        if not retry_indexes or not policy.allow(retry + 1, len(retry_indexes)):
+            return results
+        retry += 1
+        retry_after = max(results[index].get('retry_after') or 0 for index in retry_indexes)
+        time.sleep(policy.delay(retry, retry_after))
+        pending = retry_indexes
+
+
+async def acall_with_retry(send, policy):
+    """call_with_retry() 의 async 버전 - send 는 코루틴 함수"""
+    retry = 0
+    while True:
+        result = await send()
+        if policy is None or not policy.is_retryable(result) or not policy.allow(retry + 1):
+            result['attempts'] = retry + 1
+            return result
+        retry += 1
+        await asyncio.sleep(policy.delay(retry, result.get('retry_after')))
+
+
+async def acall_batch_with_retry(send_batch, messages, policy):
+    """call_batch_with_retry() 의 async 버전 - send_batch 는 코루틴 함수"""
+    results = [None] * len(messages)
+    pending = list(range(len(messages)))
+    retry = 0
+    while True:
+        sent = await send_batch([messages[i] for i in pending])
+        retry_indexes = []
+        for index, result in zip(pending, sent):
+            result['attempts'] = retry + 1
+            results[index] = result
+            if policy is not None and policy.is_retryable(result):
+                retry_indexes.append(index)
+
+        if not retry_indexes or not policy.allow(retry + 1, len(retry_indexes)):
+            return results
+        retry += 1
+        retry_after = max(results[index].get('retry_after') or 0 for index in retry_indexes)
+        await asyncio.sleep(policy.delay(retry, retry_after))
+        pending = retry_indexes
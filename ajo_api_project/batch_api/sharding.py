@@ -0,0 +1,184 @@
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .ack import AckWriter
+from .claims import ClaimLease, iter_claimed_chunks, new_claim_token, release_claims
+from .failures import FailureWriter
+from .jobs import JobHeartbeat
+from .log import logger
+from .models import BatchLog, Woo
+from .pipeline import ChunkSender, complete_batch_log, get_chunk_size, get_error_limit
+from .throttle import reset_throttle
+
+
+def get_process_count():
+    """샤드 실행 프로세스 수 (settings.BATCH_SHARD_PROCESSES, 0 이면 CPU 코어 수)"""
+    return max(1, int(getattr(settings, 'BATCH_SHARD_PROCESSES', 0) or os.cpu_count() or 1))
+
+
+def split_shards(min_id, max_id, count):
+    """[min_id, max_id] 를 count 개 이하의 연속 id 구간 (start, end) 으로 분할"""
+    span = max_id - min_id + 1
+    count = max(1, min(count, span))
+    bounds = [min_id + span * i // count for i in range(count + 1)]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(count)]
+
+
+def _init_worker(processes):
+    """샤드 워커 프로세스 초기화 - 속도 제한은 프로세스 수로 나눠서 전체 합이 설정값이 되도록"""
+    django.setup()
+    rate = float(getattr(settings, 'AEP_RATE_LIMIT_RPS', 0))
+    if rate > 0:
+        settings.AEP_RATE_LIMIT_RPS = rate / processes
+        reset_throttle()
+
+
+def run_shard(batch_pk, batch_id, shard_no, min_id, max_id, expected_records):
+    """샤드 1개 실행 (워커 프로세스) - 청크 단위로 선점 후 전송하고 통계 dict 반환
+
+    청크마다 BatchLog 건수를 F() 로 누적하므로 상태 API 에서 전체 진행 상황을 볼 수 있다.
+    """
+    started = time.perf_counter()
+    token = new_claim_token(f'shard{shard_no}')
+    lease = ClaimLease(token)
+
+    try:
+        with AckWriter(token=token) as ack, FailureWriter(batch_pk) as failures:
+            sender = ChunkSender(batch_pk, f'{batch_id}/shard{shard_no}', expected_records, ack, failures, lease)
+            for records in iter_claimed_chunks(token, get_chunk_size(), min_id, max_id, lease):
+                sender.send(records, lambda: release_claims(
+                    token, records[0][0], records[-1][0], state=Woo.SEND_STATE_FAILED
+                ))
+    finally:
+        # 중단된 경우 아직 선점 중인 레코드를 다음 배치 대상으로 되돌림
+        release_claims(token, min_id, max_id)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "event=shard_done shard=%d range=%d-%d success=%d fail=%d retries=%d skipped=%d elapsed=%.3fs",
+        shard_no, min_id, max_id, sender.success_count, sender.fail_count, sender.retry_count,
+        sender.skipped_count, elapsed
+    )
+    return {
+        'shard': shard_no,
+        'success_count': sender.success_count,
+        'fail_count': sender.fail_count,
+        'retry_count': sender.retry_count,
+        'skipped_count': sender.skipped_count,
+        'errors': sender.errors,
+        'elapsed': elapsed,
+    }
+
+
+def run_sharded_batch(processes=None, shards=None, progress=None):
+    """미전송 id 범위를 샤드로 나눠 프로세스 풀에서 실행하고 하나의 BatchLog 로 집계
+
+    progress 가 주어지면 샤드가 끝날 때마다 누적 통계 dict 로 호출된다.
+    """
+    processes = processes or get_process_count()
+    batch_started = time.perf_counter()
+    batch_log = BatchLog.objects.create(
+        batch_id=f"batch_{uuid.uuid4().hex[:8]}",
+        status='RUNNING',
+        heartbeat_at=timezone.now()
+    )
+    with JobHeartbeat(batch_log):
+        return _execute_sharded_batch(batch_log, processes, shards, progress, batch_started)
+
+
+def _execute_sharded_batch(batch_log, processes, shards, progress, batch_started):
+    batch_id = batch_log.batch_id
+
+    snapshot = Woo.objects.filter(is_sent=False).aggregate(
+        total=Count('id'), min_id=Min('id'), max_id=Max('id')
+    )
+    batch_log.total_records = snapshot['total']
+    batch_log.save()
+
+    if snapshot['total'] == 0:
+        complete_batch_log(batch_log, 0, 0, 0, [])
+        return {
+            'status': 'completed',
+            'batch_id': batch_id,
+            'total_records': 0,
+            'success_count': 0,
+            'fail_count': 0,
+            'batch_status': 'SUCCESS',
+            'message': 'No unsent records to process'
+        }
+
+    # 프로세스당 여러 샤드를 두어 샤드별 처리 시간 차이를 흡수
+    shard_ranges = split_shards(snapshot['min_id'], snapshot['max_id'], shards or processes * 4)
+    expected_records = snapshot['total'] // len(shard_ranges) + 1
+    success_count = fail_count = retry_count = skipped_count = 0
+    errors = []
+    error_limit = get_error_limit()
+
+    # heartbeat/aep-async 스레드가 도는 중에 fork 하지 않도록 spawn 으로 새 인터프리터에서 시작
+    # (_init_worker 가 django.setup() 실행) - 부모의 DB 연결도 물려주지 않음
+    connections.close_all()
+    with ProcessPoolExecutor(
+        processes, mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker, initargs=(processes,)
+    ) as pool:
+        futures = {
+            pool.submit(run_shard, batch_log.pk, batch_id, shard_no, min_id, max_id, expected_records): shard_no
+            for shard_no, (min_id, max_id) in enumerate(shard_ranges, 1)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error("event=shard_failed batch=%s shard=%d error=%s", batch_id, futures[future], e)
+                errors.append({'shard': futures[future], 'error': str(e)})
+                continue
+
+            success_count += result['success_count']
+            fail_count += result['fail_count']
+            retry_count += result['retry_count']
+            skipped_count += result['skipped_count']
+            errors.extend(result['errors'][:max(0, error_limit - len(errors))])
+
+            if progress is not None:
+                progress({
+                    'batch_id': batch_id,
+                    'shard': done,
+                    'shards': len(shard_ranges),
+                    'total_records': batch_log.total_records,
+                    'processed': success_count + fail_count + skipped_count,
+                    'success_count': success_count,
+                    'fail_count': fail_count,
+                    'retry_count': retry_count,
+                    'skipped_count': skipped_count,
+                    'elapsed': time.perf_counter() - batch_started,
+                })
+
+    complete_batch_log(batch_log, success_count, fail_count, retry_count, errors, skipped_count)
+
+    logger.info(
+        "event=batch_done batch=%s status=%s total=%d success=%d fail=%d retries=%d skipped=%d "
+        "processes=%d shards=%d elapsed=%.3fs",
+        batch_id, batch_log.status, batch_log.total_records, success_count, fail_count,
+        retry_count, skipped_count, processes, len(shard_ranges), time.perf_counter() - batch_started
+    )
+
+    return {
+        'status': 'completed',
+        'batch_id': batch_id,
+        'total_records': batch_log.total_records,
+        'success_count': success_count,
+        'fail_count': fail_count,
+        'retry_count': retry_count,
+        'skipped_count': skipped_count,
+        'batch_status': batch_log.status,
+        'errors': errors if errors else None
+    }
@@ -0,0 +1,139 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .ack import AckWriter
+from .claims import ClaimLease, claim_ids, fail_claimed_ids
+from .failures import FailureWriter
+from .jobs import JobHeartbeat
+from .log import logger
+from .models import BatchLog, SyncWatermark, Woo
+from .pipeline import ChunkSender, get_chunk_size
+
+
+def get_destination():
+    """기본 동기화 대상 이름 (settings.SYNC_DESTINATION)"""
+    return getattr(settings, 'SYNC_DESTINATION', 'aep')
+
+
+def get_safety_lag():
+    """동기화 상한을 현재 시각보다 앞당기는 초 (settings.SYNC_SAFETY_LAG_SECONDS)"""
+    return max(0.0, float(getattr(settings, 'SYNC_SAFETY_LAG_SECONDS', 30)))
+
+
+def changed_querysets(modified_at, last_id, until):
+    """워터마크 (modified_at, last_id) 이후 until 까지 변경된 레코드를 (modified_at, id) 순서의 조회 2개로 분할
+
+    (같은 modified_at 에서 id 가 큰 것) 다음 (modified_at 이 큰 것) 순서이며, 둘 다
+    woo_modified_idx 범위 조회가 된다. OR 한 번으로 묶으면 인덱스 하한을 쓰지 못한다.
+    """
+    newer = Woo.objects.filter(modified_at__lte=until)
+    if modified_at is None:
+        return [newer]
+    return [
+        Woo.objects.filter(modified_at=modified_at, id__gt=last_id),
+        newer.filter(modified_at__gt=modified_at),
+    ]
+
+
+def count_changed(modified_at, last_id, until):
+    """워터마크 이후 변경된 레코드 수"""
+    return sum(queryset.count() for queryset in changed_querysets(modified_at, last_id, until))
+
+
+def iter_changed_pages(modified_at, last_id, until, chunk_size):
+    """워터마크 이후 변경된 레코드의 (id, modified_at) 를 (modified_at, id) 순으로 chunk_size 건씩 순회"""
+    while True:
+        page = []
+        for queryset in changed_querysets(modified_at, last_id, until):
+            page.extend(
+                queryset.order_by('modified_at', 'id')
+                .values_list('id', 'modified_at')[:chunk_size - len(page)]
+            )
+            if len(page) >= chunk_size:
+                break
+        if not page:
+            return
+        yield page
+        last_id, modified_at = page[-1]
+
+
+def run_sync(destination=None, progress=None):
+    """워터마크 이후 추가/변경된 레코드만 전송하고 워터마크를 전진 후 결과 dict 반환
+
+    청크마다 처리한 마지막 (modified_at, id) 까지 워터마크를 저장한다. 전송에 실패한 레코드는
+    is_sent=False (failed) 로 되돌리고 BatchRecordFailure 에 기록하므로, 워터마크는 넘어가더라도
+    run_batch / retry_batch 에서 다시 전송된다. 다른 배치가 선점 중인 레코드는 그 배치가 처리한다.
+    """
+    destination = destination or get_destination()
+    batch_started = time.perf_counter()
+    batch_log = BatchLog.objects.create(
+        batch_id=f"sync_{uuid.uuid4().hex[:8]}",
+        status='RUNNING',
+        heartbeat_at=timezone.now()
+    )
+    with JobHeartbeat(batch_log):
+        return _execute_sync(batch_log, destination, progress, batch_started)
+
+
+def _execute_sync(batch_log, destination, progress, batch_started):
+    batch_id = batch_log.batch_id
+    watermark, _ = SyncWatermark.objects.get_or_create(destination=destination)
+
+    # 실행 중 변경되는 레코드는 다음 동기화에서 처리 - modified_at 은 커밋이 아닌 저장 시각이므로
+    # 아직 커밋되지 않은 변경을 워터마크가 지나치지 않도록 SYNC_SAFETY_LAG_SECONDS 이전까지만 전송
+    until = timezone.now() - timedelta(seconds=get_safety_lag())
+    batch_log.total_records = count_changed(watermark.modified_at, watermark.last_id, until)
+    batch_log.save()
+
+    lease = ClaimLease(batch_id)
+    ack = AckWriter(token=batch_id, include_sent=True)
+    failures = FailureWriter(batch_log.pk)
+    sender = ChunkSender(
+        batch_log.pk, batch_id, batch_log.total_records, ack, failures, lease, progress, batch_started
+    )
+
+    try:
+        with ack, failures:
+            pages = iter_changed_pages(watermark.modified_at, watermark.last_id, until, get_chunk_size())
+            for page in pages:
+                ids = [record_id for record_id, _ in page]
+                # 중단되어도 성공한 전송은 반영하고, 남은 선점은 미전송(failed) 으로 되돌림
+                chunk = claim_ids(batch_id, ids, include_sent=True, lease=lease)
+                sender.send(chunk, lambda: fail_claimed_ids(batch_id, ids))
+
+                # 청크 결과가 모두 반영된 뒤에 워터마크 전진
+                watermark.last_id, watermark.modified_at = page[-1]
+                watermark.save(update_fields=['last_id', 'modified_at', 'updated_at'])
+    except Exception as e:
+        logger.exception("event=sync_failed batch=%s destination=%s", batch_id, destination)
+        sender.errors.append({'error': str(e)})
+
+    sender.complete(batch_log)
+
+    logger.info(
+        "event=sync_done batch=%s destination=%s status=%s total=%d success=%d fail=%d skipped=%d "
+        "watermark=%s/%d elapsed=%.3fs",
+        batch_id, destination, batch_log.status, batch_log.total_records, sender.success_count,
+        sender.fail_count, sender.skipped_count, watermark.modified_at, watermark.last_id, time.perf_counter() - batch_started
+    )
+
+    return {
+        'status': 'completed',
+        'batch_id': batch_id,
+        'destination': destination,
+        'total_records': batch_log.total_records,
+        'success_count': sender.success_count,
+        'fail_count': sender.fail_count,
+        'retry_count': sender.retry_count,
+        'skipped_count': sender.skipped_count,
+        'batch_status': batch_log.status,
+        'watermark': {
+            'modified_at': watermark.modified_at.isoformat() if watermark.modified_at else None,
+            'last_id': watermark.last_id,
+        },
+        'errors': sender.errors if sender.errors else None
+    }
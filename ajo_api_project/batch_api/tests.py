@@ -1,3 +1,719 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import gzip
+import io
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import json_backend, metrics
+from .ack import AckWriter
+from .aep import PayloadTemplate, _batch_results, _single_result, build_request, transform_to_aep_format
+from .async_http_client import Response
+from .claims import ClaimLease, claim_ids, claim_records, iter_claimed_chunks, release_claims
+from .health import get_snapshot
+from .jobs import JobHeartbeat, claim_next_job, resume_pending_jobs
+from .models import BatchLog, BatchRecordFailure, Woo
+from .pipeline import execute_batch, send_chunk
+from .retry import RetryPolicy, call_with_retry
+from .sharding import run_sharded_batch
+from .sync import run_sync
+from .throttle import AdaptiveConcurrencyLimiter
+
+
+def create_woos(count):
+    Woo.objects.bulk_create([
+        Woo(email=f'test{i}@example.com', phone='+821000000000', name=f'woo{i}', _id=f'woo{i}',
+            createdby='test', modifiedby='test')
+        for i in range(count)
+    ])
+    return list(Woo.objects.order_by('id').values_list('id', flat=True))
+
+
+def expire_claims(token):
+    """token 의 선점을 만료된 것으로 만듦 (다른 워커가 가져갈 수 있는 상태)"""
+    Woo.objects.filter(claimed_by=token).update(claim_expires_at=timezone.now() - timedelta(seconds=1))
+
+
+@override_settings(AEP_MOCK_MODE=True, AEP_MAX_WORKERS=1, AEP_SKIP_UNCHANGED=False)
+class ClaimTests(TestCase):
+    def setUp(self):
+        self.ids = create_woos(10)
+
+    def test_claim_marks_rows_in_flight(self):
+        records = claim_records('a', limit=4)
+
+        self.assertEqual([record[0] for record in records], self.ids[:4])
+        self.assertEqual(
+            Woo.objects.filter(claimed_by='a', send_state=Woo.SEND_STATE_IN_FLIGHT).count(), 4
+        )
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        first = claim_records('a', limit=4)
+        second = claim_records('b', limit=4)
+
+        self.assertFalse({record[0] for record in first} & {record[0] for record in second})
+        self.assertEqual(claim_ids('b', self.ids[:4]), [])
+
+    def test_expired_claim_is_reclaimed(self):
+        claim_records('a', limit=4)
+        expire_claims('a')
+
+        records = claim_records('b', limit=4)
+
+        self.assertEqual([record[0] for record in records], self.ids[:4])
+        self.assertEqual(Woo.objects.filter(claimed_by='b').count(), 4)
+
+    def test_fallback_claim_matches_returning(self):
+        with mock.patch('batch_api.claims.supports_update_returning', return_value=False):
+            first = claim_records('a', limit=4)
+            self.assertEqual(claim_records('b', limit=4)[0][0], self.ids[4])
+            expire_claims('a')
+            self.assertEqual([record[0] for record in claim_ids('c', self.ids[:4])], self.ids[:4])
+        self.assertEqual([record[0] for record in first], self.ids[:4])
+
+    def test_release_returns_unsent_rows(self):
+        claim_records('a', limit=4)
+        release_claims('a', self.ids[0], self.ids[-1])
+
+        self.assertFalse(Woo.objects.filter(send_state=Woo.SEND_STATE_IN_FLIGHT).exists())
+        self.assertEqual(len(claim_records('b', limit=10)), 10)
+
+    def test_ack_skips_rows_reclaimed_by_another_token(self):
+        claim_records('a', limit=4)
+        expire_claims('a')
+        claim_records('b', limit=2)
+
+        with AckWriter(token='a') as ack:
+            for record_id in self.ids[:4]:
+                ack.add(record_id)
+
+        self.assertEqual(ack.written, 2)
+        self.assertEqual(
+            list(Woo.objects.filter(is_sent=True).order_by('id').values_list('id', flat=True)), self.ids[2:4]
+        )
+        self.assertEqual(Woo.objects.filter(claimed_by='b', is_sent=False).count(), 2)
+
+
+@override_settings(AEP_MOCK_MODE=True, AEP_MAX_WORKERS=1, AEP_SKIP_UNCHANGED=False)
+class ClaimLeaseTests(TestCase):
+    def setUp(self):
+        self.ids = create_woos(5)
+
+    def test_claim_uses_lease_expiry(self):
+        lease = ClaimLease('a', seconds=600, margin=0)
+        claim_records('a', limit=5, lease=lease)
+
+        expires_at = Woo.objects.values_list('claim_expires_at', flat=True).first()
+        self.assertGreater(expires_at, timezone.now() + timedelta(seconds=590))
+        self.assertTrue(lease.is_sendable())
+
+    def test_renew_extends_live_claims(self):
+        lease = ClaimLease('a', seconds=600, margin=0)
+        claim_records('a', limit=5, lease=lease)
+        Woo.objects.update(claim_expires_at=timezone.now() + timedelta(seconds=10))
+        lease.renewed_at -= 300
+
+        self.assertEqual(lease.renew(self.ids[0], self.ids[-1]), 5)
+        self.assertFalse(Woo.objects.filter(claim_expires_at__lt=timezone.now() + timedelta(seconds=590)).exists())
+
+    def test_renew_is_throttled(self):
+        lease = ClaimLease('a', seconds=600, margin=0)
+        claim_records('a', limit=5, lease=lease)
+
+        self.assertEqual(lease.renew(self.ids[0], self.ids[-1]), 0)
+
+    def test_expired_lease_is_not_renewed(self):
+        lease = ClaimLease('a', seconds=600, margin=0)
+        claim_records('a', limit=5, lease=lease)
+        lease.deadline = time.monotonic() - 1
+        lease.renewed_at -= 300
+
+        self.assertEqual(lease.renew(self.ids[0], self.ids[-1]), 0)
+        self.assertFalse(lease.is_sendable())
+
+    def test_lease_margin_blocks_send_near_expiry(self):
+        lease = ClaimLease('a', seconds=600, margin=700)
+        lease.start()
+
+        self.assertFalse(lease.is_sendable())
+
+    def test_expired_lease_records_are_not_sent(self):
+        lease = ClaimLease('a', seconds=600, margin=0)
+        chunk = next(iter_claimed_chunks('a', 5, lease=lease))
+        lease.deadline = time.monotonic() - 1
+
+        with mock.patch('batch_api.dispatcher.send_to_aep') as send, AckWriter(token='a') as ack:
+            success, fail, retries, skipped = send_chunk(chunk, ack, lease=lease)
+
+        send.assert_not_called()
+        self.assertEqual((success, fail, retries, skipped), (0, 5, 0, 0))
+        self.assertEqual(ack.written, 0)
+
+    @override_settings(AEP_BATCH_MODE=True)
+    def test_expired_lease_batches_are_not_sent(self):
+        lease = ClaimLease('a', seconds=600, margin=0)
+        chunk = next(iter_claimed_chunks('a', 5, lease=lease))
+        lease.deadline = time.monotonic() - 1
+
+        with mock.patch('batch_api.dispatcher.send_batch_to_aep') as send, AckWriter(token='a') as ack:
+            success, fail, _, _ = send_chunk(chunk, ack, lease=lease)
+
+        send.assert_not_called()
+        self.assertEqual((success, fail), (0, 5))
+
+    def test_live_lease_records_are_sent_and_acked(self):
+        lease = ClaimLease('a', seconds=600, margin=0)
+        chunk = next(iter_claimed_chunks('a', 5, lease=lease))
+
+        with AckWriter(token='a') as ack:
+            success, fail, _, _ = send_chunk(chunk, ack, lease=lease)
+
+        self.assertEqual((success, fail), (5, 0))
+        self.assertEqual(Woo.objects.filter(is_sent=True, send_state=Woo.SEND_STATE_SENT).count(), 5)
+
+    @override_settings(AEP_SKIP_UNCHANGED=True)
+    def test_skipped_records_are_acked_without_hash_updates(self):
+        with AckWriter(token='a') as ack:
+            send_chunk(next(iter_claimed_chunks('a', 5)), ack)
+        hashes = dict(Woo.objects.values_list('id', 'payload_hash'))
+        Woo.objects.update(is_sent=False, send_state=Woo.SEND_STATE_PENDING)
+
+        with mock.patch.object(AckWriter, '_write_hashes') as write_hashes, AckWriter(token='b') as ack:
+            _, _, _, skipped = send_chunk(next(iter_claimed_chunks('b', 5)), ack)
+
+        write_hashes.assert_not_called()
+        self.assertEqual(skipped, 5)
+        self.assertEqual(Woo.objects.filter(is_sent=True).count(), 5)
+        self.assertEqual(dict(Woo.objects.values_list('id', 'payload_hash')), hashes)
+
+    @override_settings(BATCH_CLAIM_LEASE_SECONDS=1, AEP_CONNECT_TIMEOUT=3, AEP_READ_TIMEOUT=10)
+    def test_lease_is_at_least_twice_the_request_timeout(self):
+        self.assertEqual(ClaimLease('a').seconds, 26)
+
+
+@override_settings(AEP_MAX_RETRY_AFTER=60)
+class RetryAfterTests(TestCase):
+    def test_retry_after_within_cap_is_retried_after_wait(self):
+        result = _single_result(Response(503, {'Retry-After': '2'}, b''))
+        policy = RetryPolicy(base_delay=0.001, max_delay=0.001)
+
+        self.assertEqual(result['retry_after'], 2)
+        self.assertTrue(policy.is_retryable(result))
+        self.assertGreaterEqual(policy.delay(1, result['retry_after']), 2)
+
+    def test_retry_after_over_cap_is_not_retried(self):
+        result = _single_result(Response(429, {'Retry-After': '3600'}, b''))
+
+        self.assertEqual(result['retry_after'], 60)
+        self.assertFalse(RetryPolicy().is_retryable(result))
+
+    def test_batch_retry_after_over_cap_is_not_retried(self):
+        results = _batch_results(Response(503, {'Retry-After': '3600'}, b''), 2)
+
+        self.assertEqual([result['retryable'] for result in results], [False, False])
+
+    def test_call_with_retry_does_not_sleep_for_capped_retry_after(self):
+        send = mock.Mock(return_value=_single_result(Response(429, {'Retry-After': '3600'}, b'')))
+
+        with mock.patch('batch_api.retry.time.sleep') as sleep:
+            result = call_with_retry(send, RetryPolicy())
+
+        sleep.assert_not_called()
+        self.assertEqual((send.call_count, result['attempts']), (1, 1))
+
+
+class BatchResultsTests(SimpleTestCase):
+    def test_multi_status_maps_each_message_to_its_record(self):
+        body = (
+            b'{"responses":[{"status":200,"xactionId":"a"},{"status":400,"message":"bad schema"},'
+            b'{"status":"201","xactionId":"c"},{"status":503,"message":"busy"}]}'
+        )
+
+        results = _batch_results(Response(207, {}, body), 4)
+
+        self.assertEqual(
+            [(result['success'], result['status_code']) for result in results],
+            [(True, 200), (False, 400), (True, 201), (False, 503)]
+        )
+        self.assertEqual(results[0]['response'], 'a')
+        self.assertEqual(results[1]['error'], 'bad schema')
+
+    def test_short_responses_list_fails_messages_without_entry(self):
+        body = b'{"responses":[{"status":200},{"status":200}]}'
+
+        results = _batch_results(Response(207, {}, body), 4)
+
+        self.assertEqual([result['success'] for result in results], [True, True, False, False])
+        self.assertEqual(results[3]['error'], 'No response for message')
+
+    def test_missing_responses_marks_all_messages_successful(self):
+        results = _batch_results(Response(200, {}, b'{}'), 3)
+
+        self.assertEqual([result['success'] for result in results], [True, True, True])
+
+    def test_unparsable_message_status_fails_only_that_message(self):
+        body = b'{"responses":[{"status":200,"xactionId":"a"},{"status":"oops"},{"status":null},{"status":[500]}]}'
+
+        results = _batch_results(Response(207, {}, body), 4)
+
+        self.assertEqual([result['success'] for result in results], [True, False, True, False])
+        self.assertIn("'oops'", results[1]['error'])
+        self.assertFalse(RetryPolicy().is_retryable(results[1]))
+
+
+class AdaptiveConcurrencyLimiterAsyncTests(SimpleTestCase):
+    def test_release_from_thread_wakes_async_waiter(self):
+        limiter = AdaptiveConcurrencyLimiter(1)
+        ticket = limiter.acquire()
+
+        async def wait_for_slot():
+            waiter = asyncio.ensure_future(limiter.aacquire())
+            await asyncio.sleep(0.01)
+            self.assertFalse(waiter.done())
+            threading.Timer(0.01, limiter.release, [ticket]).start()
+            return await asyncio.wait_for(waiter, 1)
+
+        asyncio.run(wait_for_slot())
+        self.assertEqual(limiter.in_flight, 1)
+        self.assertFalse(limiter.async_waiters)
+
+    def test_cancelled_waiter_passes_wakeup_on(self):
+        limiter = AdaptiveConcurrencyLimiter(1, maximum=1)
+        ticket = limiter.acquire()
+
+        async def cancel_first_waiter():
+            first = asyncio.ensure_future(limiter.aacquire())
+            second = asyncio.ensure_future(limiter.aacquire())
+            await asyncio.sleep(0.01)
+            limiter.release(ticket)
+            first.cancel()
+            await asyncio.wait_for(second, 1)
+            self.assertTrue(first.cancelled())
+
+        asyncio.run(cancel_first_waiter())
+        self.assertEqual(limiter.in_flight, 1)
+
+
+@override_settings(BATCH_JOB_STALE_SECONDS=60)
+class JobTakeoverTests(TestCase):
+    def create_job(self, batch_id, status, heartbeat_age=None, from_queue=True):
+        heartbeat_at = timezone.now() - timedelta(seconds=heartbeat_age) if heartbeat_age is not None else None
+        return BatchLog.objects.create(
+            batch_id=batch_id, status=status, heartbeat_at=heartbeat_at, from_queue=from_queue
+        )
+
+    def test_stale_running_job_is_taken_over(self):
+        self.create_job('stale', 'RUNNING', heartbeat_age=120)
+
+        job = claim_next_job()
+
+        self.assertEqual(job.batch_id, 'stale')
+        self.assertGreater(BatchLog.objects.get(batch_id='stale').heartbeat_at, timezone.now() - timedelta(seconds=5))
+        self.assertIsNone(claim_next_job())
+
+    def test_live_running_job_is_not_taken_over(self):
+        self.create_job('live', 'RUNNING', heartbeat_age=10)
+
+        self.assertIsNone(claim_next_job())
+
+    def test_queued_job_is_claimed_before_stale_job(self):
+        self.create_job('stale', 'RUNNING', heartbeat_age=120)
+        self.create_job('queued', 'QUEUED')
+
+        self.assertEqual(claim_next_job().batch_id, 'queued')
+
+    def test_legacy_running_job_without_heartbeat_uses_started_at(self):
+        job = self.create_job('legacy', 'RUNNING')
+        BatchLog.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(seconds=120))
+
+        self.assertEqual(claim_next_job().batch_id, 'legacy')
+
+    def test_stale_job_not_from_queue_is_not_taken_over(self):
+        self.create_job('sync_stale', 'RUNNING', heartbeat_age=120, from_queue=False)
+
+        self.assertIsNone(claim_next_job())
+
+    @override_settings(AEP_MOCK_MODE=True, AEP_MAX_WORKERS=1, AEP_SKIP_UNCHANGED=False)
+    def test_taken_over_job_uses_fresh_claim_token(self):
+        ids = create_woos(5)
+        self.create_job('stale', 'RUNNING', heartbeat_age=120)
+        # 이전 실행이 아직 보내는 중인 레코드 (배치 ID 로 선점)
+        claim_records('stale', limit=2)
+
+        execute_batch(claim_next_job())
+
+        self.assertEqual(
+            list(Woo.objects.filter(id__in=ids[:2]).values_list('claimed_by', 'send_state')),
+            [('stale', Woo.SEND_STATE_IN_FLIGHT)] * 2
+        )
+        self.assertEqual(Woo.objects.filter(id__in=ids[2:], is_sent=True).count(), 3)
+
+    def test_resume_starts_worker_for_queued_jobs(self):
+        self.create_job('queued', 'QUEUED')
+
+        with mock.patch('batch_api.jobs.start_inline_worker') as start:
+            resume_pending_jobs()
+
+        start.assert_called_once_with()
+
+    def test_resume_rechecks_when_running_job_would_go_stale(self):
+        self.create_job('live', 'RUNNING', heartbeat_age=10)
+
+        with mock.patch('batch_api.jobs.start_inline_worker') as start, \
+                mock.patch('batch_api.jobs.threading.Timer') as timer:
+            resume_pending_jobs()
+
+        start.assert_not_called()
+        self.assertAlmostEqual(timer.call_args[0][0], 51, delta=2)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    def test_heartbeat_updates_running_job(self):
+        job = BatchLog.objects.create(
+            batch_id='running', status='RUNNING', heartbeat_at=timezone.now() - timedelta(seconds=120)
+        )
+
+        with JobHeartbeat(job, interval=0.01):
+            time.sleep(0.1)
+
+        self.assertGreater(
+            BatchLog.objects.get(pk=job.pk).heartbeat_at, timezone.now() - timedelta(seconds=5)
+        )
+        self.assertEqual(job.heartbeat_at, BatchLog.objects.get(pk=job.pk).heartbeat_at)
+
+
+@override_settings(
+    AEP_MOCK_MODE=True, AEP_MAX_WORKERS=1, AEP_SKIP_UNCHANGED=False, SYNC_SAFETY_LAG_SECONDS=0
+)
+class SyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ids = create_woos(5)
+
+    def test_recent_changes_wait_for_safety_lag(self):
+        with override_settings(SYNC_SAFETY_LAG_SECONDS=60):
+            result = run_sync()
+
+        self.assertEqual(result['total_records'], 0)
+        self.assertEqual(Woo.objects.filter(is_sent=False).count(), 5)
+
+    def test_resent_records_do_not_reduce_unsent_count_twice(self):
+        get_snapshot()
+        run_sync()
+        self.assertEqual(get_snapshot()['unsent_records'], 0)
+
+        for woo in Woo.objects.filter(id__in=self.ids[:2]):
+            woo.save()
+        result = run_sync()
+
+        self.assertEqual(result['success_count'], 2)
+        self.assertEqual(get_snapshot()['unsent_records'], 0)
+
+    def test_claims_are_released_when_send_fails(self):
+        get_snapshot()
+        run_sync()
+        Woo.objects.filter(id__in=self.ids[:2]).update(modified_at=timezone.now())
+
+        with mock.patch('batch_api.pipeline.send_chunk', side_effect=RuntimeError('boom')), \
+                self.assertLogs('batch_api', 'ERROR'):
+            result = run_sync()
+
+        self.assertEqual(result['batch_status'], 'FAILED')
+        self.assertFalse(Woo.objects.filter(send_state=Woo.SEND_STATE_IN_FLIGHT).exists())
+        self.assertEqual(list(Woo.objects.filter(is_sent=False).values_list('id', flat=True)), self.ids[:2])
+        self.assertEqual(get_snapshot()['unsent_records'], 2)
+
+    def test_first_sync_after_migration_skips_legacy_sent_records(self):
+        # 0008 적용 직후 상태 - 모든 기존 레코드의 modified_at 이 컬럼 추가 시각, 워터마크 없음
+        sent_at = timezone.now() - timedelta(days=1)
+        Woo.objects.update(modified_at=timezone.now())
+        Woo.objects.filter(id__in=self.ids[:3]).update(is_sent=True, sent_at=sent_at, send_state=Woo.SEND_STATE_SENT)
+        Woo.objects.filter(id=self.ids[0]).update(sent_at=None)
+        backfill = import_module('batch_api.migrations.0008_woo_modified_at_sync_watermark').backfill_sync_state
+        backfill(django_apps, None)
+
+        result = run_sync()
+
+        self.assertEqual(result['total_records'], 2)
+        self.assertEqual(Woo.objects.filter(is_sent=True).count(), 5)
+        self.assertEqual(Woo.objects.get(id=self.ids[1]).sent_at, sent_at)
+
+
+class BatchHistoryTests(TestCase):
+    def test_failed_batch_without_failure_records_shows_error_message(self):
+        BatchLog.objects.create(batch_id='failed', status='FAILED', error_message='database is locked' + 'x' * 200)
+
+        out = io.StringIO()
+        call_command('batch_history', stdout=out)
+
+        self.assertIn('Error: database is locked' + 'x' * 62 + '\n', out.getvalue())
+
+
+class JsonBackendTests(SimpleTestCase):
+    def test_datetimes_are_formatted_the_same_on_every_backend(self):
+        data = {
+            'at': datetime.datetime(2026, 10, 18, 10, 0, 0, 998660, tzinfo=datetime.timezone.utc),
+            'values': [datetime.date(2026, 1, 2), (datetime.time(1, 2, 3, 4000),)],
+        }
+        expected = b'{"at":"2026-10-18T10:00:00.998Z","values":["2026-01-02",["01:02:03.004"]]}'
+
+        for backend in json_backend.available_backends():
+            with self.subTest(backend=backend):
+                self.assertEqual(json_backend.dumps(data, backend=backend), expected)
+
+
+class PayloadTemplateTests(SimpleTestCase):
+    def test_render_matches_transform_to_aep_format(self):
+        records = [
+            {'id': 1, 'email': 'a"b@example.com', 'phone': '100%', 'name': '김철수 \\ "따옴표"', '_id': 'x%sy%%'},
+            {'id': 2, 'email': 'émile@example.com', 'phone': None, 'name': 'tab\there\nline\x00😀', '_id': '< >'},
+        ]
+
+        for record in records:
+            with self.subTest(id=record['id']):
+                expected = json.dumps(transform_to_aep_format(record), ensure_ascii=False, separators=(',', ':'))
+                self.assertEqual(PayloadTemplate().render(record), expected.encode('utf-8'))
+
+
+class AckWriterTests(TestCase):
+    def test_long_runs_use_range_update_and_the_rest_in_chunks(self):
+        ids = create_woos(100)
+        long_run, short_run, scattered = ids[:40], ids[45:76], ids[80:100:2]
+        writer = AckWriter(chunk_size=20)
+        # add() 는 chunk_size 마다 flush 하므로 한 번에 반영될 id 를 직접 쌓음
+        writer.pending.extend(long_run + short_run + scattered)
+
+        with CaptureQueriesContext(connection) as queries:
+            written = writer.flush()
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len([sql for sql in updates if ' BETWEEN ' in sql]), 1)
+        self.assertEqual(len([sql for sql in updates if ' IN (' in sql]), 3)  # 31 + 10 건을 20 건씩
+        self.assertEqual(written, 81)
+        self.assertEqual(
+            list(Woo.objects.filter(is_sent=True).values_list('id', flat=True)),
+            long_run + short_run + scattered
+        )
+
+
+class InlineExecutor:
+    """ProcessPoolExecutor 대신 현재 프로세스에서 바로 실행 (테스트 DB 공유)"""
+    created = []
+
+    def __init__(self, *args, **kwargs):
+        self.created.append(kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@override_settings(AEP_MOCK_MODE=True, AEP_MAX_WORKERS=1, AEP_SKIP_UNCHANGED=False, BATCH_CHUNK_SIZE=3)
+class ShardedBatchTests(TestCase):
+    def test_shard_counts_roll_up_into_one_batch_log(self):
+        ids = create_woos(40)
+        sent = []
+
+        def record_chunk(chunk, *args):
+            sent.extend(record[0] for record in chunk)
+            return send_chunk(chunk, *args)
+
+        with mock.patch('batch_api.sharding.ProcessPoolExecutor', InlineExecutor), \
+                mock.patch('batch_api.pipeline.send_chunk', side_effect=record_chunk):
+            result = run_sharded_batch(processes=2, shards=4)
+
+        self.assertEqual(InlineExecutor.created[-1]['mp_context'].get_start_method(), 'spawn')
+        self.assertEqual(sorted(sent), ids)
+        self.assertEqual(BatchLog.objects.count(), 1)
+        batch_log = BatchLog.objects.get()
+        self.assertEqual(
+            (batch_log.status, batch_log.total_records, batch_log.success_count, batch_log.fail_count),
+            ('SUCCESS', 40, 40, 0)
+        )
+        self.assertEqual(result['success_count'], 40)
+        self.assertEqual(Woo.objects.filter(is_sent=True).count(), 40)
+
+
+class BatchFailuresViewTests(TestCase):
+    def setUp(self):
+        self.batch_log = BatchLog.objects.create(batch_id='batch_failed', status='PARTIAL', fail_count=5)
+        BatchRecordFailure.objects.bulk_create([
+            BatchRecordFailure(batch=self.batch_log, woo_id=woo_id, status_code=500, error='boom')
+            for woo_id in range(1, 6)
+        ])
+
+    def test_pages_by_after_and_limit_with_next_link(self):
+        url = '/api/batch/status/batch_failed/failures/?limit=2'
+        pages = []
+        while url:
+            body = self.client.get(url).json()
+            pages.append([failure['woo_id'] for failure in body['failures']])
+            url = body['next']
+
+        self.assertEqual(pages, [[1, 2], [3, 4], [5]])
+
+    def test_next_link_continues_after_last_failure(self):
+        first = BatchRecordFailure.objects.order_by('id')[1].id
+
+        body = self.client.get(f'/api/batch/status/batch_failed/failures/?after={first}&limit=2').json()
+
+        self.assertEqual([failure['woo_id'] for failure in body['failures']], [3, 4])
+        self.assertEqual(
+            body['next'], f"/api/batch/status/batch_failed/failures/?after={first + 2}&limit=2"
+        )
+        self.assertEqual(body['fail_count'], 5)
+
+    def test_invalid_paging_parameters_return_400(self):
+        response = self.client.get('/api/batch/status/batch_failed/failures/?after=x')
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(AEP_MOCK_MODE=True, AEP_MAX_WORKERS=1, AEP_SKIP_UNCHANGED=False)
+class RetryBatchViewTests(TestCase):
+    def create_parent(self, status):
+        return BatchLog.objects.create(batch_id=f'parent_{status.lower()}', status=status)
+
+    def test_retry_resends_only_parent_failures(self):
+        ids = create_woos(6)
+        parent = self.create_parent('PARTIAL')
+        # ids[5] 는 실패 후 다른 배치에서 이미 전송됨
+        Woo.objects.filter(id=ids[5]).update(is_sent=True, send_state=Woo.SEND_STATE_SENT)
+        BatchRecordFailure.objects.bulk_create([
+            BatchRecordFailure(batch=parent, woo_id=woo_id, status_code=503) for woo_id in (ids[1], ids[3], ids[5])
+        ])
+        sent = []
+
+        def record_chunk(chunk, *args):
+            sent.extend(record[0] for record in chunk)
+            return send_chunk(chunk, *args)
+
+        with mock.patch('batch_api.jobs.start_inline_worker'):
+            response = self.client.post(f'/api/batch/retry/{parent.batch_id}/')
+        with mock.patch('batch_api.pipeline.send_chunk', side_effect=record_chunk):
+            job = claim_next_job()
+            execute_batch(job)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['batch_id'], job.batch_id)
+        self.assertEqual(job.parent_id, parent.pk)
+        self.assertEqual(sorted(sent), [ids[1], ids[3]])
+        self.assertEqual(
+            list(Woo.objects.filter(is_sent=False).values_list('id', flat=True)), [ids[0], ids[2], ids[4]]
+        )
+
+    def test_retry_while_parent_is_queued_or_running_returns_409(self):
+        for status in ('QUEUED', 'RUNNING'):
+            with self.subTest(status=status):
+                parent = self.create_parent(status)
+
+                response = self.client.post(f'/api/batch/retry/{parent.batch_id}/')
+
+                self.assertEqual(response.status_code, 409)
+                self.assertFalse(BatchLog.objects.filter(parent=parent).exists())
+
+
+@override_settings(AEP_GZIP_ENABLED=True, AEP_GZIP_MIN_BYTES=512)
+class GzipRequestTests(SimpleTestCase):
+    def test_body_at_threshold_is_gzipped(self):
+        body = b'{"a":"' + b'x' * 504 + b'"}'
+
+        headers, data = build_request(body)
+
+        self.assertEqual(len(body), 512)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(data), body)
+
+    def test_body_below_threshold_is_sent_as_is(self):
+        body = b'{"a":"' + b'x' * 503 + b'"}'
+
+        headers, data = build_request(body)
+
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertIs(data, body)
+
+    @override_settings(AEP_GZIP_ENABLED=False)
+    def test_disabled_gzip_never_compresses(self):
+        headers, _ = build_request(b'x' * 4096)
+
+        self.assertNotIn('Content-Encoding', headers)
+
+
+# Prometheus text 형식 샘플 줄: 이름{레이블="값",...} 값
+SAMPLE_LINE = re.compile(
+    r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{((?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\.)*",?)*)\})? (\S+)$'
+)
+
+
+def parse_exposition(text):
+    """render() 결과를 {(이름, 레이블 문자열): 값} 으로 파싱 - 형식이 틀린 줄이 있으면 AssertionError"""
+    assert text.endswith('\n')
+    samples = {}
+    types = {}
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            continue
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert kind in ('counter', 'gauge', 'histogram', 'untyped'), line
+            types[name] = kind
+            continue
+        match = SAMPLE_LINE.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        assert name in types or name.rsplit('_', 1)[0] in types, line
+        samples[name, labels or ''] = float(value)
+    return samples
+
+
+class MetricsRenderTests(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        with mock.patch('batch_api.metrics._registry', []):
+            histogram = metrics.Histogram('test_seconds', 'test "histogram"\nsecond line', ['op'], buckets=(0.1, 1))
+            for value in (0.05, 0.1, 0.5, 5):
+                histogram.observe(value, ('a"b',))
+            samples = parse_exposition(metrics.render())
+
+        labels = 'op="a\\"b"'
+        self.assertEqual(
+            [samples['test_seconds_bucket', f'{labels},le="{bound}"'] for bound in ('0.1', '1.0', '+Inf')],
+            [2, 3, 4]
+        )
+        self.assertEqual(samples['test_seconds_count', labels], 4)
+        self.assertAlmostEqual(samples['test_seconds_sum', labels], 5.65)
+
+    def test_registered_metrics_render_valid_exposition(self):
+        metrics.record_results(3, 1, 2, 0)
+        metrics.record_db_update('ack', time.perf_counter())
+
+        samples = parse_exposition(metrics.render())
+
+        self.assertGreaterEqual(samples['batch_records_sent_total', ''], 3)
+        self.assertEqual(
+            samples['batch_db_update_seconds_bucket', 'op="ack",le="+Inf"'],
+            samples['batch_db_update_seconds_count', 'op="ack"']
+        )
@@ -0,0 +1,242 @@
+import asyncio
+import collections
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+
+_throttle = None
+_throttle_lock = threading.Lock()
+
+
+class TokenBucket:
+    """초당 rate 개 토큰, 최대 burst 개까지 적립 (rate <= 0 이면 제한 없음)"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take(self):
+        """토큰 1개를 가져오면 0, 부족하면 다음 토큰까지 기다릴 초"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """토큰 1개를 얻을 때까지 대기"""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self):
+        """acquire() 의 async 버전 - 이벤트 루프를 막지 않고 대기"""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD 방식 동시 요청 수 제한
+
+    성공하면 limit 을 요청 1건당 1/limit 씩 늘리고 (대략 한 윈도우마다 +1),
+    혼잡 신호(429/5xx/타임아웃)를 받으면 decrease_factor 배로 줄인다.
+    직전 감소 이전에 보낸 요청의 혼잡 신호는 이미 반영된 것으로 보고 무시한다 (윈도우당 1회 감소).
+    Retry-After 를 받으면 그 시간 동안 새 요청을 내보내지 않는다.
+    """
+
+    def __init__(self, initial, minimum=1, maximum=None, decrease_factor=0.5):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum or initial))
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+        # aacquire() 대기자 (loop, future) - release() 가 빈 슬롯 수만큼 깨움
+        self.async_waiters = collections.deque()
+
+    def acquire(self):
+        """동시 요청 슬롯을 얻을 때까지 대기 후 시작 시각 반환 (release 에 전달)"""
+        with self.cond:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self.cond.wait(pause)
+                elif self.in_flight < int(self.limit):
+                    break
+                else:
+                    self.cond.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    async def aacquire(self):
+        """acquire() 의 async 버전 - Condition 대신 release() 가 완료시키는 future 를 기다려 이벤트 루프를 막지 않음"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.cond:
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return time.monotonic()
+                waiter = None
+                if pause <= 0:
+                    waiter = loop.create_future()
+                    self.async_waiters.append((loop, waiter))
+            if waiter is None:
+                await asyncio.sleep(pause)
+                continue
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self.cond:
+                    try:
+                        self.async_waiters.remove((loop, waiter))
+                    except ValueError:
+                        # 이미 깨워진 뒤 취소됨 - 받은 슬롯 알림을 다음 대기자에게 넘김
+                        self._wake_async(1)
+                raise
+
+    def _wake_async(self, count):
+        """aacquire() 대기자를 최대 count 개 깨움 (self.cond 를 잡은 상태로 호출)"""
+        while count > 0 and self.async_waiters:
+            loop, waiter = self.async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                # 루프가 이미 닫힘
+                continue
+            count -= 1
+
+    def release(self, started, congested=False, retry_after=None):
+        """슬롯 반환 및 결과에 따라 limit 조정"""
+        with self.cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested:
+                if started >= self.last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            self.cond.notify_all()
+            self._wake_async(int(self.limit) - self.in_flight)
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def parse_retry_after(value, max_seconds=None):
+    """Retry-After 헤더 (초 또는 HTTP-date) -> 대기 초 (해석 불가 시 None)"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    seconds = max(0.0, seconds)
+    if max_seconds is not None:
+        seconds = min(seconds, max_seconds)
+    return seconds
+
+
+def get_max_retry_after():
+    """Retry-After 로 기다리는 최대 초 (settings.AEP_MAX_RETRY_AFTER)"""
+    return float(getattr(settings, 'AEP_MAX_RETRY_AFTER', 60))
+
+
+def is_congestion_status(status_code):
+    """AIMD 감소 대상 응답 코드 (429, 5xx)"""
+    return status_code == 429 or status_code >= 500
+
+
+class AEPThrottle:
+    """AEP 요청 앞단의 속도 제한 (토큰 버킷) + 적응형 동시성 제어"""
+
+    def __init__(self, rate, burst, initial, minimum, maximum, adaptive=True, max_retry_after=60):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveConcurrencyLimiter(initial, minimum, maximum) if adaptive else None
+        self.max_retry_after = max_retry_after
+
+    def acquire(self):
+        """요청 전 호출 - release() 에 넘길 ticket 반환"""
+        ticket = self.limiter.acquire() if self.limiter is not None else None
+        self.bucket.acquire()
+        return ticket
+
+    async def aacquire(self):
+        """acquire() 의 async 버전"""
+        ticket = await self.limiter.aacquire() if self.limiter is not None else None
+        await self.bucket.aacquire()
+        return ticket
+
+    def release(self, ticket, response=None, error=None):
+        """요청 결과(response 또는 예외)를 반영하고 슬롯 반환"""
+        if self.limiter is None:
+            return
+        if response is not None:
+            congested = is_congestion_status(response.status_code)
+            retry_after = parse_retry_after(response.headers.get('Retry-After'), self.max_retry_after)
+        else:
+            congested = error is not None
+            retry_after = None
+        self.limiter.release(ticket, congested=congested, retry_after=retry_after)
+
+
+def build_throttle():
+    """settings 값으로 AEPThrottle 생성"""
+    max_workers = int(getattr(settings, 'AEP_MAX_WORKERS', 8))
+    return AEPThrottle(
+        rate=float(getattr(settings, 'AEP_RATE_LIMIT_RPS', 0)),
+        burst=getattr(settings, 'AEP_RATE_LIMIT_BURST', None),
+        initial=max_workers,
+        minimum=int(getattr(settings, 'AEP_MIN_CONCURRENCY', 1)),
+        maximum=max_workers,
+        adaptive=getattr(settings, 'AEP_ADAPTIVE_CONCURRENCY', True),
+        max_retry_after=get_max_retry_after(),
+    )
+
+
+def get_throttle():
+    """프로세스 전역 AEPThrottle (최초 호출 시 생성)"""
+    global _throttle
+    if _throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                _throttle = build_throttle()
+    return _throttle
+
+
+def reset_throttle():
+    """전역 AEPThrottle 폐기 (설정 변경 후 재생성이 필요할 때)"""
+    global _throttle
+    with _throttle_lock:
+        _throttle = None
@@ -1,10 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+
+def _read_view(name):
+    """조회 뷰 - ASGI 배포 (BATCH_ASYNC_VIEWS=True) 면 async 버전"""
+    return getattr(views, f'a{name}' if settings.BATCH_ASYNC_VIEWS else name)
+
+
 urlpatterns = [
-    path('health/', views.health_check, name='health_check'),
+    path('health/', _read_view('health_check'), name='health_check'),
+    path('health/live/', _read_view('liveness_check'), name='liveness_check'),
+    path('metrics/', _read_view('batch_metrics'), name='batch_metrics'),
     path('run/', views.run_batch, name='run_batch'),
-    path('status/<str:batch_id>/', views.batch_status, name='batch_status'),
-    path('list/', views.batch_list, name='batch_list'),
+    path('retry/<str:batch_id>/', views.retry_batch, name='retry_batch'),
+    path('status/<str:batch_id>/', _read_view('batch_status'), name='batch_status'),
+    path('status/<str:batch_id>/failures/', views.batch_failures, name='batch_failures'),
+    path('list/', _read_view('batch_list'), name='batch_list'),
     path('test-payload/', views.test_payload, name='test_payload'),  # 추가
 ]
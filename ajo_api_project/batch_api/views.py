@@ -1,151 +1,94 @@
-import json
-import uuid
-import requests
 from datetime import datetime
 from functools import wraps
-from django.conf import settings
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.urls import reverse
+from django.utils.log import log_response
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from .models import BatchLog, Woo
-from django.utils import timezone
+from . import metrics
+from .aep import transform_to_aep_format
+from .health import aget_snapshot, get_snapshot
+from .jobs import submit_batch
+from .json_backend import JsonResponse
+from .models import BatchLog
 
 
-def fetch_data_from_db():
-    """전송되지 않은 데이터만 조회"""
-    results = Woo.objects.filter(is_sent=False).values(
-        'id', 'email', 'phone', 'name', '_id', 'createdby', 'modifiedby'
-    )
-    return list(results)
+def require_http_methods_async(request_method_list):
+    """async 뷰용 require_http_methods (Django 4.2 데코레이터는 async 뷰를 sync 함수로 감싸버림)"""
+    def decorator(view_func):
+        @wraps(view_func)
+        async def inner(request, *args, **kwargs):
+            if request.method not in request_method_list:
+                response = HttpResponseNotAllowed(request_method_list)
+                log_response(
+                    "Method Not Allowed (%s): %s", request.method, request.path,
+                    response=response, request=request,
+                )
+                return response
+            return await view_func(request, *args, **kwargs)
+        return inner
+    return decorator
 
 
-def transform_to_aep_format(db_record):
-    """DB 레코드를 AEP 포맷으로 변환 - header/body 구조"""
-    tenant_key = settings.AEP_TENANT_ID.strip('_')
-    
-    return {
-        "header": {
-            "schemaRef": {
-                "id": settings.AEP_SCHEMA_ID,
-                "contentType": "application/vnd.adobe.xed-full+json;version=1"
-            },
-            "imsOrgId": settings.AEP_IMS_ORG_ID,
-            "datasetId": settings.AEP_DATASET_ID,
-            "source": {
-                "name": "Batch API Source"
-            }
-        },
-        "body": {
-            "xdmMeta": {
-                "schemaRef": {
-                    "id": settings.AEP_SCHEMA_ID,
-                    "contentType": "application/vnd.adobe.xed-full+json;version=1"
-                }
-            },
-            "xdmEntity": {
-                "_id": db_record.get('_id'),
-                "identityMap": {
-                    "crmId": [
-                        {
-                            "id": db_record.get('_id')
-                        }
-                    ],
-                    "id": [
-                        {
-                            "id": db_record.get('_id')
-                        }
-                    ]
-                },
-                f"_{tenant_key}": {
-                    "TEST_ID": db_record.get('id'),
-                    "TEST_NAME": db_record.get('name'),
-                    "identification": {
-                        "core": {
-                            "email": db_record.get('email'),
-                            "phoneNumber": db_record.get('phone'),
-                            "crmId": db_record.get('_id')
-                        }
-                    }
-                }
-            }
-        }
-    }
-
+# 조회 뷰는 sync/async 두 벌 - urls.py 가 BATCH_ASYNC_VIEWS (ASGI 배포) 에 따라 고름.
+# WSGI 에서 async 뷰는 요청마다 이벤트 루프를 거쳐 오히려 느려진다.
 
-def send_to_aep(payload):
-    """AEP로 데이터 전송"""
-    if getattr(settings, 'AEP_MOCK_MODE', True):
-        print("⚠️ MOCK MODE 활성화됨!")
-        return {
-            'success': True,
-            'status_code': 200,
-            'response': 'MOCK MODE: Data not actually sent to AEP',
-            'mock': True
-        }
-    
-    aep_endpoint = settings.AEP_STREAMING_ENDPOINT
-    
-    headers = {
-        'Content-Type': 'application/json',
-        'x-gw-ims-org-id': settings.AEP_IMS_ORG_ID,
-    }
-    
-    print("=" * 80)
-    print("🚀 AEP로 전송 시작")
-    print(f"Endpoint: {aep_endpoint}")
-    print(f"Headers: {headers}")
-    print(f"Payload:")
-    print(json.dumps(payload, indent=2, ensure_ascii=False))
-    print("=" * 80)
-    
-    try:
-        response = requests.post(
-            aep_endpoint,
-            headers=headers,
-            json=payload,
-            timeout=10
-        )
-        
-        print(f"✅ 응답 코드: {response.status_code}")
-        print(f"📄 응답 내용: {response.text}")
-        print("=" * 80)
-        
-        if response.status_code in [200, 201, 202]:
-            return {
-                'success': True,
-                'status_code': response.status_code,
-                'response': response.text
-            }
-        else:
-            print(f"❌ 에러 발생!")
-            return {
-                'success': False,
-                'status_code': response.status_code,
-                'error': response.text
-            }
-    except requests.exceptions.RequestException as e:
-        print(f"🔥 예외 발생: {str(e)}")
-        print("=" * 80)
-        return {
-            'success': False,
-            'error': str(e)
-        }
+def _health_response(snapshot):
+    return JsonResponse({
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "service": "Batch API",
+        "database": snapshot
+    })
 
 
 @require_http_methods(["GET"])
 def health_check(request):
-    """헬스 체크 엔드포인트"""
+    """헬스 체크 엔드포인트 - 레코드 수는 HEALTH_CACHE_TTL 동안 캐시된 스냅샷"""
+    return _health_response(get_snapshot())
+
+
+@require_http_methods_async(["GET"])
+async def ahealth_check(request):
+    """health_check 의 async 버전"""
+    return _health_response(await aget_snapshot())
+
+
+def _liveness_response():
     return JsonResponse({
-        "status": "healthy",
+        "status": "alive",
         "timestamp": datetime.utcnow().isoformat() + "Z",
-        "service": "Batch API",
-        "database": {
-            "total_records": Woo.objects.count(),
-            "unsent_records": Woo.objects.filter(is_sent=False).count()
-        }
+        "service": "Batch API"
     })
 
 
+@require_http_methods(["GET"])
+def liveness_check(request):
+    """라이브니스 체크 - DB 에 접근하지 않음 (로드밸런서 프로브용)"""
+    return _liveness_response()
+
+
+@require_http_methods_async(["GET"])
+async def aliveness_check(request):
+    """liveness_check 의 async 버전"""
+    return _liveness_response()
+
+
+@require_http_methods(["GET"])
+def batch_metrics(request):
+    """Prometheus text 형식 메트릭 - 이 프로세스에서 실행한 배치의 계측값과 큐 깊이/미전송 수"""
+    metrics.QUEUE_DEPTH.set(BatchLog.objects.filter(status='QUEUED').count())
+    metrics.UNSENT_RECORDS.set(get_snapshot()['unsent_records'])
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@require_http_methods_async(["GET"])
+async def abatch_metrics(request):
+    """batch_metrics 의 async 버전"""
+    metrics.QUEUE_DEPTH.set(await BatchLog.objects.filter(status='QUEUED').acount())
+    metrics.UNSENT_RECORDS.set((await aget_snapshot())['unsent_records'])
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 
 ALLOWED_IPS = ['127.0.0.1', 'localhost', '::1']
 
@@ -169,153 +112,164 @@ def require_local_ip(view_func):
 @csrf_exempt
 @require_http_methods(["POST"])
 def run_batch(request):
-    """배치 실행 - 전송되지 않은 데이터만"""
-    batch_id = f"batch_{uuid.uuid4().hex[:8]}"
-    
-    # 배치 로그 생성
-    batch_log = BatchLog.objects.create(
-        batch_id=batch_id,
-        status='RUNNING'
-    )
+    """배치 실행 요청 - 작업을 큐에 등록하고 batch_id 를 즉시 반환"""
+    batch_log = submit_batch()
     
+    return JsonResponse({
+        'status': 'queued',
+        'batch_id': batch_log.batch_id,
+        'batch_status': batch_log.status,
+        'status_url': reverse('batch_status', args=[batch_log.batch_id])
+    }, status=202)
+
+
+@require_local_ip
+@csrf_exempt
+@require_http_methods(["POST"])
+def retry_batch(request, batch_id):
+    """실패 레코드 재전송 요청 - 원래 배치의 실패 레코드만 대상으로 하는 하위 배치를 큐에 등록"""
     try:
-        # 1. 전송되지 않은 데이터 조회
-        db_records = fetch_data_from_db()
-        batch_log.total_records = len(db_records)
-        batch_log.save()
-        
-        if len(db_records) == 0:
-            batch_log.status = 'SUCCESS'
-            batch_log.completed_at = timezone.now()
-            batch_log.save()
-            
-            return JsonResponse({
-                'status': 'completed',
-                'batch_id': batch_id,
-                'total_records': 0,
-                'success_count': 0,
-                'fail_count': 0,
-                'batch_status': 'SUCCESS',
-                'message': 'No unsent records to process'
-            })
-        
-        success_count = 0
-        fail_count = 0
-        errors = []
-        success_ids = []
-        
-        # 2. 각 레코드를 AEP로 전송
-        for record in db_records:
-            try:
-                # AEP 포맷으로 변환
-                aep_payload = transform_to_aep_format(record)
-                
-                # AEP로 전송
-                result = send_to_aep(aep_payload)
-                
-                if result.get('success'):
-                    success_count += 1
-                    success_ids.append(record.get('id'))
-                else:
-                    fail_count += 1
-                    errors.append({
-                        'record_id': record.get('id'),
-                        'error': result.get('error', 'Unknown error')
-                    })
-            except Exception as e:
-                fail_count += 1
-                errors.append({
-                    'record_id': record.get('id'),
-                    'error': str(e)
-                })
-        
-        # 3. 성공한 레코드 플래그 업데이트
-        if success_ids:
-            Woo.objects.filter(id__in=success_ids).update(
-                is_sent=True,
-                sent_at=timezone.now()
-            )
-        
-        # 4. 배치 로그 업데이트
-        batch_log.success_count = success_count
-        batch_log.fail_count = fail_count
-        batch_log.completed_at = timezone.now()
-        
-        if fail_count == 0:
-            batch_log.status = 'SUCCESS'
-        elif success_count == 0:
-            batch_log.status = 'FAILED'
-            batch_log.error_message = json.dumps(errors)
-        else:
-            batch_log.status = 'PARTIAL'
-            batch_log.error_message = json.dumps(errors)
-        
-        batch_log.save()
-        
+        parent = BatchLog.objects.defer('error_message').get(batch_id=batch_id)
+    except BatchLog.DoesNotExist:
         return JsonResponse({
-            'status': 'completed',
-            'batch_id': batch_id,
-            'total_records': batch_log.total_records,
-            'success_count': success_count,
-            'fail_count': fail_count,
-            'batch_status': batch_log.status,
-            'errors': errors if errors else None
-        })
-        
-    except Exception as e:
-        batch_log.status = 'FAILED'
-        batch_log.error_message = str(e)
-        batch_log.completed_at = timezone.now()
-        batch_log.save()
-        
+            'error': 'Batch not found'
+        }, status=404)
+
+    if parent.status in ('QUEUED', 'RUNNING'):
         return JsonResponse({
-            'status': 'failed',
-            'batch_id': batch_id,
-            'error': str(e)
-        }, status=500)
+            'error': f'Batch is still {parent.status}'
+        }, status=409)
+
+    batch_log = submit_batch(parent=parent)
+
+    return JsonResponse({
+        'status': 'queued',
+        'batch_id': batch_log.batch_id,
+        'parent_batch_id': parent.batch_id,
+        'batch_status': batch_log.status,
+        'status_url': reverse('batch_status', args=[batch_log.batch_id])
+    }, status=202)
+
+
+def _batch_status_queryset():
+    return BatchLog.objects.select_related('parent').defer('parent__error_message')
+
+
+def _batch_status_response(batch_log):
+    return JsonResponse({
+        'batch_id': batch_log.batch_id,
+        'parent_batch_id': batch_log.parent.batch_id if batch_log.parent else None,
+        'status': batch_log.status,
+        'total_records': batch_log.total_records,
+        'success_count': batch_log.success_count,
+        'fail_count': batch_log.fail_count,
+        'retry_count': batch_log.retry_count,
+        'skipped_count': batch_log.skipped_count,
+        'started_at': batch_log.started_at.isoformat() if batch_log.started_at else None,
+        'completed_at': batch_log.completed_at.isoformat() if batch_log.completed_at else None,
+        'error_message': batch_log.error_message,
+        'failures_url': reverse('batch_failures', args=[batch_log.batch_id])
+    })
+
+
+def _batch_not_found():
+    return JsonResponse({
+        'error': 'Batch not found'
+    }, status=404)
 
 
 @require_http_methods(["GET"])
 def batch_status(request, batch_id):
     """배치 상태 조회"""
     try:
-        batch_log = BatchLog.objects.get(batch_id=batch_id)
-        return JsonResponse({
-            'batch_id': batch_log.batch_id,
-            'status': batch_log.status,
-            'total_records': batch_log.total_records,
-            'success_count': batch_log.success_count,
-            'fail_count': batch_log.fail_count,
-            'started_at': batch_log.started_at.isoformat() if batch_log.started_at else None,
-            'completed_at': batch_log.completed_at.isoformat() if batch_log.completed_at else None,
-            'error_message': batch_log.error_message
-        })
+        return _batch_status_response(_batch_status_queryset().get(batch_id=batch_id))
+    except BatchLog.DoesNotExist:
+        return _batch_not_found()
+
+
+@require_http_methods_async(["GET"])
+async def abatch_status(request, batch_id):
+    """batch_status 의 async 버전"""
+    try:
+        return _batch_status_response(await _batch_status_queryset().aget(batch_id=batch_id))
+    except BatchLog.DoesNotExist:
+        return _batch_not_found()
+
+
+FAILURE_PAGE_SIZE = 100
+FAILURE_PAGE_MAX = 1000
+
+
+@require_http_methods(["GET"])
+def batch_failures(request, batch_id):
+    """배치 실패 레코드 목록 (?after=<마지막 id>&limit=<건수> 로 페이지 이동)"""
+    try:
+        batch_log = BatchLog.objects.only('id', 'batch_id', 'fail_count').get(batch_id=batch_id)
     except BatchLog.DoesNotExist:
         return JsonResponse({
             'error': 'Batch not found'
         }, status=404)
 
+    try:
+        after = int(request.GET.get('after', 0))
+        limit = min(max(1, int(request.GET.get('limit', FAILURE_PAGE_SIZE))), FAILURE_PAGE_MAX)
+    except ValueError:
+        return JsonResponse({
+            'error': 'after and limit must be integers'
+        }, status=400)
+
+    # (batch, id) 인덱스를 따라 id 기준으로 이어서 조회 (OFFSET 없음)
+    failures = list(
+        batch_log.failures.filter(id__gt=after).order_by('id').values(
+            'id', 'woo_id', 'status_code', 'error_class', 'attempts', 'error', 'created_at'
+        )[:limit]
+    )
+
+    next_url = None
+    if len(failures) == limit:
+        next_url = f"{reverse('batch_failures', args=[batch_id])}?after={failures[-1]['id']}&limit={limit}"
+
+    return JsonResponse({
+        'batch_id': batch_log.batch_id,
+        'fail_count': batch_log.fail_count,
+        'failures': failures,
+        'next': next_url
+    })
+
+
+def _batch_list_item(batch):
+    return {
+        'batch_id': batch.batch_id,
+        'status': batch.status,
+        'total_records': batch.total_records,
+        'success_count': batch.success_count,
+        'fail_count': batch.fail_count,
+        'retry_count': batch.retry_count,
+        'skipped_count': batch.skipped_count,
+        'started_at': batch.started_at.isoformat(),
+        'completed_at': batch.completed_at.isoformat() if batch.completed_at else None
+    }
+
 
 @require_http_methods(["GET"])
 def batch_list(request):
     """배치 목록 조회"""
-    batches = BatchLog.objects.all()[:20]
-    
-    batch_list = []
-    for batch in batches:
-        batch_list.append({
-            'batch_id': batch.batch_id,
-            'status': batch.status,
-            'total_records': batch.total_records,
-            'success_count': batch.success_count,
-            'fail_count': batch.fail_count,
-            'started_at': batch.started_at.isoformat(),
-            'completed_at': batch.completed_at.isoformat() if batch.completed_at else None
-        })
-    
+    batches = BatchLog.objects.defer('error_message')[:20]
+
     return JsonResponse({
         'total': BatchLog.objects.count(),
-        'batches': batch_list
+        'batches': [_batch_list_item(batch) for batch in batches]
+    })
+
+
+@require_http_methods_async(["GET"])
+async def abatch_list(request):
+    """batch_list 의 async 버전"""
+    batches = BatchLog.objects.defer('error_message')[:20]
+
+    return JsonResponse({
+        'total': await BatchLog.objects.acount(),
+        'batches': [_batch_list_item(batch) async for batch in batches]
     })
 
 